@@ -2,12 +2,58 @@ from . import edit_operator_source
 from . import edit_addon_source
 from . import python_text_api_lookup
 from . import document_addon
+from . import profiling
+from . import watch
 import bpy 
-from bpy.props import BoolProperty, StringProperty, IntProperty
-from bpy.types import AddonPreferences
+from bpy.props import BoolProperty, StringProperty, IntProperty, EnumProperty
+from bpy.types import AddonPreferences, Operator
 
-class Pid():
-    pid = -1
+def cache_path(*parts):
+    """Return a path below the persistent user directory of this addon."""
+    import os
+    try:
+        base = bpy.utils.extension_path_user(__package__, path="cache", create=True)
+    except ValueError:
+        # installed as legacy addon, which has no extension user directory
+        base = bpy.utils.user_resource('CONFIG', path=os.path.join(__package__, "cache"), create=True)
+    return os.path.join(base, *parts)
+
+def update_profiling(self, context):
+    profiling.enable(self.use_profiling)
+
+def update_watch(self, context):
+    if self.use_watch:
+        watch.start_watching()
+    else:
+        watch.stop_watching()
+
+class WM_OT_devutils_export_trace(Operator):
+    """Export the recorded phase timings as Chrome trace (chrome://tracing, Perfetto)"""
+    bl_idname = "wm.devutils_export_trace"
+    bl_label = "Export Trace"
+
+    filepath : StringProperty(subtype='FILE_PATH')
+    filter_glob : StringProperty(default="*.json", options={'HIDDEN'})
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "developer_utilities_trace.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        n = profiling.export_chrome_trace(self.filepath)
+        self.report({'INFO'}, f"Exported {n} spans to {self.filepath}")
+        return {'FINISHED'}
+
+class WM_OT_devutils_clear_trace(Operator):
+    """Discard the recorded phase timings"""
+    bl_idname = "wm.devutils_clear_trace"
+    bl_label = "Clear Timings"
+
+    def execute(self, context):
+        profiling.clear()
+        return {'FINISHED'}
 
 class DeveloperUtilitiesPreferences(AddonPreferences):
     # this must match the addon name, use '__package__'
@@ -28,32 +74,163 @@ class DeveloperUtilitiesPreferences(AddonPreferences):
     
     use_server : BoolProperty(
             name="Start HTTP Server",
-            description="Start a python -m http.server (local webserver) in the documentation directory and point a browser there",
+            description="Serve the documentation from a local webserver inside Blender and point a browser there",
             default=False,
             )
     
     server_port : IntProperty(
             name="Server Port",
-            description="Port to be used if the server is started, change it here if ports are blocked",
+            description="Port to be used if the server is started, a free port is used if this one is taken",
             default=8000,
             min = 0,
             max = 65535,
             )
 
+    use_watch : BoolProperty(
+            name="Reload Changed Sources",
+            description="Reload opened source files when they are changed outside of Blender, unless they have unsaved edits",
+            default=True,
+            update=update_watch,
+            )
+
+    source_loading : EnumProperty(
+            name="Loading",
+            description="How Edit Addon Sources loads the files of an addon",
+            items=[('ALL', "All at Once", "Load every source file right away"),
+                   ('DEFERRED', "In Background", "Load the entry module right away and the rest in small batches"),
+                   ('PLACEHOLDERS', "On Demand", "Load the entry module and list the rest, each is read when opened")],
+            default='DEFERRED',
+            )
+
+    source_include : StringProperty(
+            name="Include",
+            description="Semicolon separated patterns of the files to load, patterns with a / match the path inside the addon",
+            default="*.py",
+            )
+
+    source_exclude : StringProperty(
+            name="Exclude",
+            description="Semicolon separated patterns of files and directories to skip, patterns with a / match the path inside the addon",
+            default=".*;__pycache__;venv;site-packages;node_modules;vendor;_vendor;wheels",
+            )
+
+    source_max_kb : IntProperty(
+            name="Max File Size (KB)",
+            description="Skip source files larger than this, 0 for no limit",
+            default=1024,
+            min = 0,
+            )
+
+    max_open_texts : IntProperty(
+            name="Max Opened Texts",
+            description="Close the least recently used unmodified texts this addon opened beyond this count, 0 for no limit",
+            default=100,
+            min = 0,
+            )
+
+    max_open_text_mb : IntProperty(
+            name="Max Opened Text Size (MB)",
+            description="Close the least recently used unmodified texts this addon opened beyond this total file size, 0 for no limit",
+            default=64,
+            min = 0,
+            )
+
+    search_workers : IntProperty(
+            name="Search Workers",
+            description="Number of processes parsing sources when searching operator calls, 0 uses all cores",
+            default=0,
+            min = 0,
+            max = 256,
+            )
+
+    docs_workers : IntProperty(
+            name="Render Workers",
+            description="Number of processes rendering documentation pages, 0 uses all cores. "
+                        "Only used by the documentation worker on linux, elsewhere pages are rendered one by one",
+            default=0,
+            min = 0,
+            max = 256,
+            )
+
+    docs_watch : BoolProperty(
+            name="Watch Sources",
+            description="Rebuild the changed pages when the sources of a documented addon change, and reload them in the browser",
+            default=False,
+            )
+
+    search_in_background : BoolProperty(
+            name="Search in Background",
+            description="Search operator calls in small steps while Blender stays responsive, showing hits as they are found",
+            default=True,
+            )
+
+    use_profiling : BoolProperty(
+            name="Record Timings",
+            description="Record the duration of the phases of searches, source loading and documentation generation",
+            default=False,
+            update=update_profiling,
+            )
+
+    def draw_profiling(self, layout):
+        box = layout.box()
+        row = box.row()
+        row.prop(self, "use_profiling")
+        row.operator("wm.devutils_export_trace", icon='EXPORT')
+        row.operator("wm.devutils_clear_trace", icon='TRASH')
+
+        rows = profiling.summary()
+        if not rows:
+            return
+
+        col = box.column(align=True)
+        for name, calls, total, longest in rows:
+            split = col.split(factor=0.4)
+            split.label(text=name)
+            split.label(text=f"{total * 1000:.1f} ms in {calls} calls, max {longest * 1000:.1f} ms")
+        for name, value in sorted(profiling.Profile.counters.items()):
+            split = col.split(factor=0.4)
+            split.label(text=name)
+            split.label(text=str(value))
+
     def draw(self, context):
         layout = self.layout
         box = layout.box()
         box.label(text="Edit Addon Options")
         box.prop(self, "use_external")
+        box.prop(self, "use_watch")
+        box.prop(self, "source_loading")
+        box.prop(self, "source_include")
+        box.prop(self, "source_exclude")
+        box.prop(self, "source_max_kb")
+        row = box.row()
+        row.prop(self, "max_open_texts")
+        row.prop(self, "max_open_text_mb")
+        box = layout.box()
+        box.label(text="Edit Operator Options")
+        row = box.row()
+        row.prop(self, "search_in_background")
+        row.prop(self, "search_workers")
         box = layout.box()
         box.label(text="Generate Documentation Options")
         box.prop(self, "target_dir")
         row = box.row()
         row.prop(self, "use_server")
         row.prop(self, "server_port")
+        row = box.row()
+        row.prop(self, "docs_workers")
+        row.prop(self, "docs_watch")
+        self.draw_profiling(layout)
 
 def register():
+    bpy.utils.register_class(WM_OT_devutils_export_trace)
+    bpy.utils.register_class(WM_OT_devutils_clear_trace)
     bpy.utils.register_class(DeveloperUtilitiesPreferences)
+    # the addon entry only exists yet if it was enabled in an earlier session
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is not None:
+        profiling.enable(addon.preferences.use_profiling)
+    if addon is None or addon.preferences.use_watch:
+        watch.start_watching()
     document_addon.register()
     edit_operator_source.register()
     edit_addon_source.register()
@@ -65,4 +242,8 @@ def unregister():
     python_text_api_lookup.unregister()
     document_addon.unregister()
     bpy.utils.unregister_class(DeveloperUtilitiesPreferences)
+    bpy.utils.unregister_class(WM_OT_devutils_clear_trace)
+    bpy.utils.unregister_class(WM_OT_devutils_export_trace)
+    profiling.enable(False)
+    watch.stop_watching()
     
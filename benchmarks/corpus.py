@@ -0,0 +1,151 @@
+"""Generator for synthetic addon source trees.
+
+The tree mimics what a call search and the other utilities walk in a real
+installation: a bl_ui package with many drawing modules and an extension
+repository with addon packages, each defining operators and calling others
+through bpy.ops and layout.operator().
+"""
+
+import os
+import random
+
+
+def operator_idname(package, index):
+    return f"pkg{package}.op{index}"
+
+
+def module_source(rng, package, module, lines, calls, operators, all_ops):
+    out = ["import bpy", "from bpy.types import Operator, Panel", ""]
+
+    for i in range(operators):
+        idname = operator_idname(package, module * operators + i)
+        out += [
+            f"class PKG{package}_OT_op{module * operators + i}(Operator):",
+            f'    """Operator {idname}"""',
+            f'    bl_idname = "{idname}"',
+            f'    bl_label = "Op {module * operators + i}"',
+            "",
+            "    def execute(self, context):",
+        ]
+        for _ in range(max(1, calls // (2 * max(operators, 1)))):
+            op = rng.choice(all_ops)
+            out.append(f"        bpy.ops.{op}()")
+        out += ["        return {'FINISHED'}", ""]
+
+    out += [
+        f"class PKG{package}_PT_panel{module}(Panel):",
+        f'    bl_label = "Panel {module}"',
+        "",
+        "    def draw(self, context):",
+        "        layout = self.layout",
+    ]
+    for _ in range(max(1, calls // 2)):
+        op = rng.choice(all_ops)
+        out.append(f'        layout.operator("{op}")')
+
+    # filler code that contains no operator calls at all
+    i = 0
+    while len(out) < lines:
+        out += [
+            "",
+            f"def helper_{i}(values):",
+            "    total = 0",
+            "    for v in values:",
+            "        total += v * 2",
+            "    return total",
+        ]
+        i += 1
+
+    out.append("")
+    return "\n".join(out)
+
+
+def init_source(package, files):
+    out = ["import bpy", ""]
+    for m in range(files):
+        out.append(f"from . import mod{m}")
+    out += [
+        "",
+        "def classes():",
+        "    import inspect",
+        "    for m in (" + "".join(f"mod{m}, " for m in range(files)) + "):",
+        "        for name, obj in inspect.getmembers(m, inspect.isclass):",
+        "            if obj.__module__ == m.__name__:",
+        "                yield obj",
+        "",
+        "def register():",
+        "    for cls in classes():",
+        "        bpy.utils.register_class(cls)",
+        "",
+        "def unregister():",
+        "    for cls in classes():",
+        "        bpy.utils.unregister_class(cls)",
+        "",
+    ]
+    return "\n".join(out)
+
+
+def generate(root, packages=20, files=10, lines=300, calls=10, operators=2, ui_files=50, seed=0):
+    """Write a synthetic tree below root and return a description of it."""
+    rng = random.Random(seed)
+
+    all_ops = [operator_idname(p, i) for p in range(packages) for i in range(files * operators)]
+    if not all_ops:
+        all_ops = ["wm.dummy"]
+
+    ui = os.path.join(root, "bl_ui")
+    os.makedirs(ui, exist_ok=True)
+    with open(os.path.join(ui, "__init__.py"), "w") as f:
+        f.write("")
+    for m in range(ui_files):
+        with open(os.path.join(ui, f"space_{m}.py"), "w") as f:
+            f.write(module_source(rng, "ui", m, lines, calls * 2, 0, all_ops))
+
+    repo = os.path.join(root, "extensions", "bench")
+    names = []
+    for p in range(packages):
+        pkg = os.path.join(repo, f"pkg{p}")
+        os.makedirs(pkg, exist_ok=True)
+        with open(os.path.join(pkg, "__init__.py"), "w") as f:
+            f.write(init_source(p, files))
+        for m in range(files):
+            with open(os.path.join(pkg, f"mod{m}.py"), "w") as f:
+                f.write(module_source(rng, p, m, lines, calls, operators, all_ops))
+        names.append(f"pkg{p}")
+
+    return {
+        "root": root,
+        "bl_ui": ui,
+        "repo": repo,
+        "packages": names,
+        "operators": all_ops,
+    }
+
+
+WORDS = ["object", "location", "mesh", "vertex", "edge", "scene", "render", "material",
+         "node", "socket", "data", "active", "select", "color", "index", "name"]
+
+
+def api_columns(structs=3000, members=25, seed=0):
+    """Return (names, kinds, details, descriptions) shaped like the offline API index
+    of a real Blender, which has a few thousand structs and operators."""
+    rng = random.Random(seed)
+    names, kinds, details, descriptions = [], [], [], []
+
+    for i in range(structs):
+        struct = "".join(rng.choice(WORDS).title() for _ in range(2)) + str(i)
+        names.append("bpy.types." + struct)
+        kinds.append('STRUCT')
+        details.append("")
+        descriptions.append(" ".join(rng.choices(WORDS, k=8)))
+        for j in range(members):
+            names.append(f"bpy.types.{struct}.{rng.choice(WORDS)}_{rng.choice(WORDS)}{j}")
+            kinds.append('PROPERTY')
+            details.append("float")
+            descriptions.append(" ".join(rng.choices(WORDS, k=10)))
+
+    names.append("bpy.types.Object.location")
+    kinds.append('PROPERTY')
+    details.append("float array of 3")
+    descriptions.append("Location of the object")
+    return names, kinds, details, descriptions
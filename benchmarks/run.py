@@ -0,0 +1,381 @@
+"""Benchmarks of the hot paths of the addon, run outside of Blender.
+
+    python benchmarks/run.py --packages 50 --files 20 --output results.json
+
+A synthetic source tree is generated, the bpy stand-in is installed and the
+addon is imported as the package developer_utilities. The results are
+written as JSON, so runs of different releases can be compared.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import platform
+import statistics
+import tempfile
+import importlib
+import itertools
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+PACKAGE = "developer_utilities"
+
+sys.path.insert(0, HERE)
+
+import corpus
+import standin
+
+
+def measure(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    return {
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "max": max(times),
+    }
+
+
+def addon_version():
+    with open(os.path.join(ROOT, "blender_manifest.toml"), encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("version"):
+                return line.split("=", 1)[1].strip().strip('"')
+    return None
+
+
+def import_addon():
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = addon
+    spec.loader.exec_module(addon)
+    return addon
+
+
+def register_corpus(tree):
+    for name in tree["packages"]:
+        importlib.import_module("bl_ext.bench." + name).register()
+
+
+def bench_get_ops(eos, args):
+    results = {}
+    results["get_ops"] = measure(eos.get_ops, args.repeat)
+
+    def cached():
+        eos.op_items(None, None)
+
+    eos.op_items(None, None)
+    results["op_items_cached"] = measure(cached, args.repeat)
+    return results
+
+
+def bench_extract(eos, files, args):
+    import ast
+    from developer_utilities.edit_operator_source.callsites import extract_calls
+
+    sources = []
+    for path in files:
+        with open(path, "rb") as f:
+            sources.append(f.read())
+
+    def parse():
+        for source in sources:
+            ast.parse(source)
+
+    def extract():
+        for source in sources:
+            extract_calls(ast.parse(source))
+
+    return {
+        "parse_only": measure(parse, args.repeat),
+        "extract_calls": measure(extract, args.repeat),
+    }
+
+
+def find_calls(eos, modules, opname, index, workers):
+    from developer_utilities.edit_operator_source.search import CallSearch
+
+    #stepped like search_tick drives a search in Blender
+    job = CallSearch(opname, eos.search_files(modules), index, workers)
+    while not job.step(0.02):
+        pass
+    return job.calls()
+
+
+def bench_find_calls(eos, tree, args):
+    from developer_utilities.edit_operator_source.callindex import CallIndex
+
+    modules = eos.search_modules()
+    opname = random.Random(args.seed).choice(tree["operators"])
+    workdir = tempfile.mkdtemp(prefix="devutils_bench_index_")
+    results = {}
+
+    def fresh():
+        bench_index[0] = CallIndex(os.path.join(workdir, "index.json"))
+
+    bench_index = [None]
+
+    def run(workers):
+        def fn():
+            find_calls(eos, modules, opname, bench_index[0], workers)
+        return fn
+
+    results["discovery"] = measure(lambda: eos.search_files(modules), args.repeat)
+    results["find_calls_cold"] = measure(run(1), args.repeat, setup=fresh)
+    if args.workers > 1:
+        results[f"find_calls_cold_{args.workers}_workers"] = measure(run(args.workers), args.repeat, setup=fresh)
+
+    fresh()
+    find_calls(eos, modules, "", bench_index[0], 1)
+    results["find_calls_warm"] = measure(run(1), args.repeat)
+
+    def reload_index():
+        bench_index[0].save()
+        bench_index[0] = CallIndex(bench_index[0].filepath)
+        bench_index[0].load()
+
+    bench_index[0].dirty = True
+    results["find_calls_next_session"] = measure(run(1), args.repeat, setup=reload_index)
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def bench_getmodule(eos, tree, args):
+    ops = random.Random(args.seed).sample(tree["operators"], min(100, len(tree["operators"])))
+
+    def lookup():
+        for op in ops:
+            eos.getmodule(op)
+
+    cold = measure(lookup, 1)
+    warm = measure(lookup, args.repeat)
+    return {
+        "getmodule_cold_per_op": {k: v / len(ops) if k != "repeat" else v for k, v in cold.items()},
+        "getmodule_warm_per_op": {k: v / len(ops) if k != "repeat" else v for k, v in warm.items()},
+    }
+
+
+def bench_addon_edit(bpy, addon, tree, args):
+    from developer_utilities.edit_addon_source import WM_OT_addon_edit
+
+    module = "bl_ext.bench." + tree["packages"][0]
+
+    def path():
+        WM_OT_addon_edit.path_from_addon(module)
+
+    def execute():
+        op = WM_OT_addon_edit(module=module)
+        op.execute(bpy.context)
+
+    def clear_texts():
+        bpy.data.texts.clear()
+
+    results = {
+        "path_from_addon": measure(path, args.repeat),
+        "addon_edit_execute": measure(execute, args.repeat, setup=clear_texts),
+    }
+    bpy.app.timers.run()
+    bpy.data.texts.clear()
+    return results
+
+
+def bench_watch(bpy, files, args):
+    from developer_utilities.watch import Watcher
+    from developer_utilities.texts import get_manager
+
+    manager = get_manager()
+    for path in files:
+        manager.open(path, evict=False)
+
+    watcher = Watcher()
+    for path in files:
+        watcher.watch(path)
+
+    results = {"watch_tick": measure(watcher.tick, args.repeat)}
+    bpy.data.texts.clear()
+    return results
+
+
+def bench_api_search(args):
+    from developer_utilities.python_text_api_lookup.apiindex import APIIndex
+
+    columns = corpus.api_columns(seed=args.seed)
+    results = {"api_index_load": measure(lambda: APIIndex(*columns), args.repeat)}
+
+    index = APIIndex(*columns)
+    for query in ("location", "e", "bpy.types.object.location", "zzz"):
+        results[f"api_search_{query}"] = measure(lambda: index.search(query), args.repeat)
+    return results
+
+
+def bench_selected_text(bpy, addon, args):
+    from developer_utilities.python_text_api_lookup import selected_text
+    from developer_utilities.python_text_api_lookup.apiindex import APIIndex, identifiers
+
+    line = "bpy.types.Object.location = obj.matrix_world.to_translation()  # " + "x" * 20
+    text = bpy.types.Text("bench.py", "", "\n".join([line] * args.selection_lines))
+    text.current_line_index = 0
+    text.current_character = 3
+    text.select_end_line_index = args.selection_lines - 1
+    text.select_end_character = 10
+    bpy.context.edit_text = text
+
+    def select():
+        selected_text(bpy.context)
+
+    index = APIIndex(*corpus.api_columns(seed=args.seed))
+    source = selected_text(bpy.context)
+
+    def resolve():
+        index.resolve_all(identifiers(source))
+
+    results = {
+        "selected_text": measure(select, args.repeat),
+        "resolve_selection": measure(resolve, args.repeat),
+    }
+    bpy.context.edit_text = None
+    return results
+
+
+def bench_document(addon, tree, args):
+    from developer_utilities import document_addon
+
+    try:
+        import pdoc
+    except ImportError:
+        return {"generate": {"skipped": "pdoc is not installed"}}
+
+    module = "bl_ext.bench." + tree["packages"][0]
+    target = tempfile.mkdtemp(prefix="devutils_bench_docs_")
+
+    def generate():
+        document_addon.generate(module_name=module, target_dir=target)
+
+    def clear_target():
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(target)
+
+    from developer_utilities.document_addon import incremental
+
+    changed = os.path.join(tree["repo"], tree["packages"][0], "mod0.py")
+    edits = itertools.count()
+
+    def change_one():
+        with open(changed, "a", encoding="utf-8") as f:
+            f.write(f"\n\ndef watched_{next(edits)}():\n    pass\n")
+
+    def rebuild():
+        #what watch mode runs in the worker after a change
+        incremental.generate(module, document_addon.docs_dir(module, target), precompile=False)
+
+    results = {
+        "generate": measure(generate, max(1, args.repeat // 2), setup=clear_target),
+        "generate_unchanged": measure(generate, args.repeat),
+        "rebuild_one_changed": measure(rebuild, args.repeat, setup=change_one),
+    }
+    shutil.rmtree(target, ignore_errors=True)
+    return results
+
+
+BENCHMARKS = ["get_ops", "extract", "find_calls", "getmodule", "addon_edit", "watch", "api_search", "selected_text", "document"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--packages", type=int, default=20, help="extension packages in the corpus")
+    parser.add_argument("--files", type=int, default=10, help="modules per package")
+    parser.add_argument("--lines", type=int, default=300, help="lines per module")
+    parser.add_argument("--calls", type=int, default=10, help="operator calls per module")
+    parser.add_argument("--operators", type=int, default=2, help="operators defined per module")
+    parser.add_argument("--ui-files", type=int, default=50, help="modules in the bl_ui stand-in")
+    parser.add_argument("--selection-lines", type=int, default=20000, help="lines selected for selected_text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", choices=BENCHMARKS, help="run only these benchmarks")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--keep-corpus", action="store_true")
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="devutils_bench_corpus_")
+    tree = corpus.generate(root, args.packages, args.files, args.lines, args.calls,
+                           args.operators, args.ui_files, args.seed)
+
+    bpy = standin.install(tree, addon_package=PACKAGE)
+    addon = import_addon()
+    standin.set_preferences(bpy, addon.DeveloperUtilitiesPreferences, PACKAGE)
+    register_corpus(tree)
+
+    eos = addon.edit_operator_source
+    files = eos.search_files(eos.search_modules())
+    selected = set(args.only or BENCHMARKS)
+
+    results = {}
+    if "get_ops" in selected:
+        results.update(bench_get_ops(eos, args))
+    if "extract" in selected:
+        results.update(bench_extract(eos, files, args))
+    if "find_calls" in selected:
+        results.update(bench_find_calls(eos, tree, args))
+    if "getmodule" in selected:
+        results.update(bench_getmodule(eos, tree, args))
+    if "addon_edit" in selected:
+        results.update(bench_addon_edit(bpy, addon, tree, args))
+    if "watch" in selected:
+        results.update(bench_watch(bpy, files, args))
+    if "api_search" in selected:
+        results.update(bench_api_search(args))
+    if "selected_text" in selected:
+        results.update(bench_selected_text(bpy, addon, args))
+    if "document" in selected:
+        results.update(bench_document(addon, tree, args))
+
+    report = {
+        "meta": {
+            "addon_version": addon_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "corpus": {
+                "packages": args.packages,
+                "files": args.files,
+                "lines": args.lines,
+                "calls": args.calls,
+                "operators": args.operators,
+                "ui_files": args.ui_files,
+                "source_files": len(files),
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+    if not args.keep_corpus:
+        shutil.rmtree(root, ignore_errors=True)
+
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
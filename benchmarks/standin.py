@@ -0,0 +1,382 @@
+"""Minimal stand-ins for bpy, _bpy, addon_utils, bl_ui, bl_ext and bl_pkg.
+
+They provide just enough of Blender's python API to import the addon and run
+its hot paths outside of Blender, they don't try to be correct otherwise.
+"""
+
+import os
+import sys
+import types
+import tempfile
+
+
+class Registry():
+    operators = []
+    classes = []
+
+
+def to_idname(bl_idname):
+    if "_OT_" in bl_idname:
+        return bl_idname
+    module, name = bl_idname.split(".", 1)
+    return f"{module.upper()}_OT_{name}"
+
+
+def prop(kind):
+    def make(**kwargs):
+        return (kind, kwargs)
+    make.__name__ = kind
+    return make
+
+
+class Struct():
+    is_registered = False
+
+    def __init__(self, **kwargs):
+        for name, value in self.defaults().items():
+            setattr(self, name, value)
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def defaults(cls):
+        values = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in getattr(klass, "__annotations__", {}).items():
+                if isinstance(value, tuple) and len(value) == 2 and isinstance(value[1], dict):
+                    values[name] = value[1].get("default", prop_default(value[0]))
+        return values
+
+    def report(self, type, message):
+        self.reports.append((set(type), message))
+
+    @property
+    def reports(self):
+        if "_reports" not in self.__dict__:
+            self.__dict__["_reports"] = []
+        return self.__dict__["_reports"]
+
+
+def prop_default(kind):
+    return {
+        "BoolProperty": False,
+        "IntProperty": 0,
+        "FloatProperty": 0.0,
+        "StringProperty": "",
+        "EnumProperty": "",
+        "CollectionProperty": None,
+        "PointerProperty": None,
+    }.get(kind)
+
+
+class Menu(Struct):
+    draw_funcs = []
+
+    @classmethod
+    def append(cls, fn):
+        cls.draw_funcs.append(fn)
+
+    @classmethod
+    def remove(cls, fn):
+        cls.draw_funcs.remove(fn)
+
+
+class Collection(list):
+
+    def add(self):
+        item = types.SimpleNamespace()
+        self.append(item)
+        return item
+
+    def remove(self, index):
+        del self[index]
+
+    def clear(self):
+        del self[:]
+
+
+class TextLine():
+
+    def __init__(self, body):
+        self.body = body
+
+
+class Text():
+
+    def __init__(self, name, filepath="", source=""):
+        self.name = name
+        self.filepath = filepath
+        self.is_modified = False
+        self.is_dirty = False
+        self.is_in_memory = not filepath
+        self.current_line_index = 0
+        self.current_character = 0
+        self.select_end_line_index = 0
+        self.select_end_character = 0
+        self.from_string(source)
+
+    def from_string(self, source):
+        self.lines = [TextLine(l) for l in source.split("\n")]
+
+    def as_string(self):
+        return "\n".join(l.body for l in self.lines)
+
+    def cursor_set(self, line, character=0, select=False):
+        # like txt_move_to, select only moves the selection end
+        self.select_end_line_index = line
+        self.select_end_character = character
+        if not select:
+            self.current_line_index = line
+            self.current_character = character
+
+    def clear(self):
+        self.from_string("")
+
+
+class Texts(list):
+
+    def load(self, filepath, internal=False):
+        with open(filepath, encoding="utf-8") as f:
+            source = f.read()
+        text = Text(os.path.basename(filepath), filepath, source)
+        self.append(text)
+        return text
+
+    def new(self, name):
+        text = Text(name)
+        self.append(text)
+        return text
+
+    def remove(self, text):
+        list.remove(self, text)
+
+    def get(self, name, default=None):
+        for text in self:
+            if text.name == name:
+                return text
+        return default
+
+
+class Timers():
+
+    def __init__(self):
+        self.funcs = {}
+
+    def register(self, fn, first_interval=0.0, persistent=False):
+        self.funcs[fn] = first_interval
+
+    def unregister(self, fn):
+        del self.funcs[fn]
+
+    def is_registered(self, fn):
+        return fn in self.funcs
+
+    def run(self, limit=100000):
+        """Call the registered timers until all are done, like Blender's event loop would."""
+        for _ in range(limit):
+            if not self.funcs:
+                return
+            for fn in list(self.funcs):
+                if self.funcs.get(fn) is None:
+                    continue
+                interval = fn()
+                if interval is None:
+                    self.funcs.pop(fn, None)
+                elif fn in self.funcs:
+                    self.funcs[fn] = interval
+
+
+class OpFunc():
+
+    def __init__(self, module, name):
+        self.idname = f"{module}.{name}"
+
+    def __call__(self, *args, **kwargs):
+        return {'FINISHED'}
+
+    def get_rna_type(self):
+        identifier = to_idname(self.idname)
+        return types.SimpleNamespace(bl_rna=types.SimpleNamespace(identifier=identifier),
+                                     identifier=identifier, description="", properties=[])
+
+    def poll(self, *args):
+        return True
+
+    def __repr__(self):
+        return f"Operator {self.idname}\nbpy.ops.{self.idname}()"
+
+
+class OpModule():
+
+    def __init__(self, module):
+        self.module = module
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return OpFunc(self.module, name)
+
+    def __dir__(self):
+        prefix = self.module.upper() + "_OT_"
+        return [i[len(prefix):] for i in Registry.operators if i.startswith(prefix)]
+
+
+class Ops():
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return OpModule(name)
+
+    def __dir__(self):
+        return sorted({i.split("_OT_", 1)[0].lower() for i in Registry.operators})
+
+
+def register_class(cls):
+    cls.is_registered = True
+    Registry.classes.append(cls)
+    idname = getattr(cls, "bl_idname", "")
+    if idname and issubclass(cls, (sys.modules["bpy"].types.Operator, sys.modules["bpy"].types.Macro)):
+        Registry.operators.append(to_idname(idname))
+    # registered classes are reachable through bpy.types by their rna identifier
+    name = to_idname(idname) if "." in idname else (idname or cls.__name__)
+    setattr(sys.modules["bpy"].types, name, cls)
+
+
+def unregister_class(cls):
+    cls.is_registered = False
+    if cls in Registry.classes:
+        Registry.classes.remove(cls)
+    idname = getattr(cls, "bl_idname", "")
+    if idname and to_idname(idname) in Registry.operators and "." in idname:
+        Registry.operators.remove(to_idname(idname))
+
+
+def install(corpus, builtin_operators=2000, addon_package="developer_utilities"):
+    """Put the stand-in modules into sys.modules, pointing at a synthetic corpus."""
+    userdir = tempfile.mkdtemp(prefix="devutils_bench_user_")
+
+    bpy = types.ModuleType("bpy")
+    bpy.__path__ = []
+
+    bpy.props = types.ModuleType("bpy.props")
+    for kind in ("BoolProperty", "IntProperty", "FloatProperty", "StringProperty",
+                 "EnumProperty", "CollectionProperty", "PointerProperty"):
+        setattr(bpy.props, kind, prop(kind))
+
+    bpy.types = types.ModuleType("bpy.types")
+    for name in ("Operator", "Macro", "Panel", "PropertyGroup", "AddonPreferences",
+                 "UIList", "UI_UL_list", "Header", "Scene", "WindowManager"):
+        setattr(bpy.types, name, type(name, (Struct,), {"__module__": "bpy.types"}))
+    for name in ("Menu", "TEXT_MT_context_menu", "TEXT_MT_edit", "TEXT_MT_text"):
+        setattr(bpy.types, name, type(name, (Menu,), {"__module__": "bpy.types", "draw_funcs": []}))
+    bpy.types.Text = Text
+
+    bpy.ops = Ops()
+
+    bpy.utils = types.ModuleType("bpy.utils")
+    bpy.utils.register_class = register_class
+    bpy.utils.unregister_class = unregister_class
+
+    def extension_path_user(package, path="", create=False):
+        p = os.path.join(userdir, package, path)
+        if create:
+            os.makedirs(p, exist_ok=True)
+        return p
+
+    def user_resource(resource_type, path="", create=False):
+        p = os.path.join(userdir, resource_type.lower(), path)
+        if create:
+            os.makedirs(p, exist_ok=True)
+        return p
+
+    bpy.utils.extension_path_user = extension_path_user
+    bpy.utils.user_resource = user_resource
+
+    bpy.path = types.SimpleNamespace(abspath=lambda path, **kwargs: path)
+
+    bpy.app = types.SimpleNamespace(
+        version=(4, 3, 0),
+        version_string="4.3.0",
+        build_hash=b"standin",
+        timers=Timers(),
+        binary_path=sys.executable,
+        tempdir=tempfile.gettempdir(),
+        background=True,
+    )
+
+    bpy.data = types.SimpleNamespace(texts=Texts(), scenes=types.SimpleNamespace(get=lambda name: None))
+
+    addon_prefs = types.SimpleNamespace(preferences=None)
+    bpy.context = types.SimpleNamespace(
+        preferences=types.SimpleNamespace(
+            addons={addon_package: addon_prefs},
+            filepaths=types.SimpleNamespace(text_editor=""),
+            extensions=types.SimpleNamespace(repos=[
+                types.SimpleNamespace(module="bench", directory=corpus["repo"], enabled=True),
+            ]),
+        ),
+        window_manager=types.SimpleNamespace(windows=[], operator_calls=Collection(), operator_calls_index=0,
+                                             addon_sources=Collection(), addon_sources_index=0),
+        scene=types.SimpleNamespace(name="Scene"),
+        edit_text=None,
+        space_data=None,
+        area=None,
+    )
+
+    _bpy = types.ModuleType("_bpy")
+    _bpy.ops = types.SimpleNamespace(dir=lambda: list(Registry.operators))
+
+    Registry.operators[:] = [f"BUILTIN{i % 40}_OT_op{i}" for i in range(builtin_operators)]
+
+    bl_ui = types.ModuleType("bl_ui")
+    bl_ui.__file__ = os.path.join(corpus["bl_ui"], "__init__.py")
+    bl_ui.__path__ = [corpus["bl_ui"]]
+
+    bl_ext = types.ModuleType("bl_ext")
+    bl_ext.__path__ = []
+    repo = types.ModuleType("bl_ext.bench")
+    repo.__path__ = [corpus["repo"]]
+    bl_ext.bench = repo
+
+    addon_utils = types.ModuleType("addon_utils")
+
+    def modules(*args, **kwargs):
+        # like the real one, rescan the repository on every call
+        mods = []
+        for name in sorted(os.listdir(corpus["repo"])):
+            init = os.path.join(corpus["repo"], name, "__init__.py")
+            if os.path.exists(init):
+                mod = types.ModuleType("bl_ext.bench." + name)
+                mod.__file__ = init
+                mods.append(mod)
+        return mods
+
+    addon_utils.modules = modules
+    addon_utils.paths = lambda: []
+
+    bl_pkg = types.ModuleType("bl_pkg")
+    bl_pkg.__path__ = []
+    ui = types.ModuleType("bl_pkg.bl_extension_ui")
+    ui.addon_draw_item_expanded = lambda **kwargs: None
+    bl_pkg.bl_extension_ui = ui
+
+    sys.modules.update({
+        "bpy": bpy,
+        "bpy.props": bpy.props,
+        "bpy.types": bpy.types,
+        "bpy.utils": bpy.utils,
+        "_bpy": _bpy,
+        "bl_ui": bl_ui,
+        "bl_ext": bl_ext,
+        "bl_ext.bench": repo,
+        "addon_utils": addon_utils,
+        "bl_pkg": bl_pkg,
+        "bl_pkg.bl_extension_ui": ui,
+    })
+    return bpy
+
+
+def set_preferences(bpy, prefs_class, package="developer_utilities"):
+    """Fill the addon preferences from the defaults of the AddonPreferences class."""
+    bpy.context.preferences.addons[package].preferences = prefs_class()
@@ -21,71 +21,102 @@ def ensure_module(name: str, package: str = None):
         #    del sys.modules[name]
         #return importlib.import_module(name)
 
+class Pdoc():
+    #whether pdoc can be imported, None until checked
+    available = None
+
+
+def pdoc_available():
+    """Return whether pdoc is installed, looked up once without importing it."""
+    import site
+    import importlib.util
+    import importlib.machinery
+
+    if Pdoc.available is None:
+        Pdoc.available = (importlib.util.find_spec("pdoc") is not None or
+                          importlib.machinery.PathFinder.find_spec("pdoc", [site.getusersitepackages()]) is not None)
+    return Pdoc.available
+
+
+def invalidate_pdoc():
+    Pdoc.available = None
+
+
 def run(cmd):
     import subprocess
     subprocess.run(cmd, check=True)
 
-def start(cmd):
-    import subprocess
-    return subprocess.Popen(cmd)
-
-def list_submodules(package):
-    
-    import pkgutil, importlib
-    
-    """List all submodules of a given package without importing them."""
-    submodules = []
-    for _, name, is_pkg in pkgutil.iter_modules(package.__path__, package.__name__ + '.'):
-        submodules.append(importlib.import_module(name))
-        if is_pkg:
-            submodules.extend(list_submodules(importlib.import_module(name)))
-    return submodules
-
-def generate(**kwargs):
-    import importlib
+def docs_dir(module_name, target_dir):
+    """Return the directory the documentation of the module is written to,
+    None if it goes next to the sources of a module which can't be found."""
     import os
-    import inspect
-    import pdoc
     import pathlib
+    from ..sources import module_origin, get_addon_index
 
-    if kwargs['target_dir'] == "":
-        mod = importlib.import_module(kwargs['module_name'])
-        script_dir = os.path.dirname(inspect.getfile(mod))
+    if target_dir == "":
+        addon_path, isdir = get_addon_index().lookup(module_name)
+        if addon_path is not None:
+            script_dir = addon_path if isdir else os.path.dirname(addon_path)
+        else:
+            origin = module_origin(module_name)
+            if origin is None:
+                return None
+            script_dir = os.path.dirname(origin)
         path = os.path.join(script_dir, "docs")
         os.makedirs(path, exist_ok=True)
         path = pathlib.Path(path)
     else:
-        path = kwargs['target_dir']
+        path = target_dir
         path = pathlib.Path(path)
         #path = path.joinpath(kwargs["module_name"])
+    return path
 
-    pdoc.pdoc(kwargs['module_name'], output_directory=path)
+def render_workers(context):
+    import os
+    from .. import DeveloperUtilitiesPreferences
 
-    return path
+    addon_prefs = context.preferences.addons[DeveloperUtilitiesPreferences.bl_idname].preferences
+    return addon_prefs.docs_workers or os.cpu_count() or 1
+
+def generate(**kwargs):
+    """Render the out of date documentation pages of the module in this process.
+    Returns (output directory, (rendered, skipped, removed) module names),
+    (None, None) if the module can't be found."""
+    from . import incremental
+    from .worker import use_user_site
 
+    use_user_site()
+    path = docs_dir(kwargs['module_name'], kwargs['target_dir'])
+    if path is None:
+        return None, None
+    report = incremental.generate(kwargs['module_name'], path, workers=kwargs.get('workers', 1))
+
+    return path, report
+
+def serve(module_name, path, port, live=False):
+    from . import server
+    from ..profiling import span
+
+    with span("server start"):
+        url = server.mount(module_name, path, port, live=live)
+    #live tabs still open from an earlier build reload
+    server.notify(module_name)
+    if server.current_port() != port:
+        print(f"Port {port} is taken, serving documentation on port {server.current_port()}")
+
+    bpy.ops.wm.url_open(url=url)
     
 def generate_and_run(**kwargs):
-
-    import sys
-    from .. import Pid
-    from pathlib import Path
     
-    path = str(generate(**kwargs)) #this is already a path
+    path, report = generate(**kwargs)
+    if path is None:
+        return None, None
+    path = str(path) #this is already a path
 
     if kwargs['server']:
-     
-        try: 
-            exe = str(Path(sys.executable))
-            port = kwargs['port']
-            cmd = [exe, '-m', 'http.server', '-d', path, str(port)]
-            Pid.pid = start(cmd).pid
-        except OSError as e:
-            print(e)
-
-        url = f"http://localhost:{port}/index.html"
-        bpy.ops.wm.url_open(url=url)
+        serve(kwargs['module_name'], path, kwargs['port'])
 
-    return path
+    return path, report
 
 class PdocInstallOperator(bpy.types.Operator):
     """Install pdoc, if necessary"""
@@ -93,22 +124,27 @@ class PdocInstallOperator(bpy.types.Operator):
     bl_label = "Install pdoc"
     def execute(self, context):
         ensure_module("pdoc")
+        invalidate_pdoc()
         return {'FINISHED'}
         
 class KillServerOperator(bpy.types.Operator):
-    """Kill the server process if one was started previously"""
+    """Stop serving and watching the documentation of the module, or all documentation"""
     bl_idname = "pdoc.kill"
-    bl_label = "Generate Documentation"
-    pid : bpy.props.IntProperty(name="pid")
+    bl_label = "Stop Documentation Server"
+    module_name : bpy.props.StringProperty(name="module_name")
     def execute(self, context):
-        import signal, os
-        from .. import Pid
+        from . import server
+        from .watch import DocsWatch, unwatch_docs
 
-        if self.pid > -1:
-            os.kill(self.pid, signal.SIGTERM)
-            Pid.pid = -1
-            return {"FINISHED"}
-        return {"CANCELLED"}
+        if not server.running() and not DocsWatch.modules:
+            return {"CANCELLED"}
+        if self.module_name:
+            unwatch_docs(self.module_name)
+            server.unmount(self.module_name)
+        else:
+            unwatch_docs()
+            server.stop()
+        return {"FINISHED"}
 
 class DocumentationOperator(bpy.types.Operator):
     """Generates Documentation with pdoc for the given module and its submodules"""
@@ -118,22 +154,157 @@ class DocumentationOperator(bpy.types.Operator):
     server: bpy.props.BoolProperty(name="server", default=False)
     port: bpy.props.IntProperty(name="port", min=0, max=65535, default=8000)
     target: bpy.props.StringProperty(name="target", default="")
+    watch: bpy.props.BoolProperty(name="watch", default=False,
+                                  description="Rebuild when the sources change and reload the pages in the browser")
+
+    def use_preferences(self, context):
+        from .. import DeveloperUtilitiesPreferences
+
+        addon_prefs = context.preferences.addons[DeveloperUtilitiesPreferences.bl_idname].preferences
+        if not self.properties.is_property_set("server"):
+            self.server = addon_prefs.use_server
+        if not self.properties.is_property_set("port"):
+            self.port = addon_prefs.server_port
+        if not self.properties.is_property_set("target"):
+            self.target = addon_prefs.target_dir
+        if not self.properties.is_property_set("watch"):
+            self.watch = addon_prefs.docs_watch
+
+    def report_done(self, rendered, skipped, removed):
+        self.report({'INFO'}, f"Documentation generated, {len(rendered)} pages rendered, "
+                              f"{len(skipped)} unchanged, {len(removed)} removed")
 
     def execute(self, context):
+        #runs in this process, for scripts and background mode
+        self.use_preferences(context)
+
         if self.module_name != "":
-            generate_and_run(module_name=self.module_name, target_dir=self.target, server=self.server, port=self.port)
-            self.report({'INFO'}, "Documentation generated")
+            path, report = generate_and_run(module_name=self.module_name, target_dir=self.target,
+                                            server=self.server, port=self.port,
+                                            workers=render_workers(context))
+            if path is None:
+                self.report({'ERROR'}, f"Module {self.module_name} not found")
+                return {'CANCELLED'}
+            self.report_done(*report)
             return {'FINISHED'}
         self.report({'ERROR'}, "Please specify a module name")
         return {'CANCELLED'}
 
+    def invoke(self, context, event):
+        from .build import Build, get_worker
+
+        self.use_preferences(context)
+        if self.module_name == "":
+            self.report({'ERROR'}, "Please specify a module name")
+            return {'CANCELLED'}
+        if not bpy.app.binary_path:
+            #blender as python module, there is no executable to run a worker with
+            return self.execute(context)
+        if Build.module:
+            self.report({'WARNING'}, f"Documentation of {Build.module} is being generated already")
+            return {'CANCELLED'}
+
+        self.path = docs_dir(self.module_name, self.target)
+        if self.path is None:
+            self.report({'ERROR'}, f"Module {self.module_name} not found")
+            return {'CANCELLED'}
+        self.id = get_worker().generate(self.module_name, self.path, render_workers(context))
+        Build.module = self.module_name
+        Build.done = 0
+        Build.total = 0
+        self.cancelling = False
+
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context):
+        from .build import Build, redraw_preferences
+
+        context.window_manager.event_timer_remove(self.timer)
+        if context.workspace is not None:
+            context.workspace.status_text_set(None)
+        Build.module = ""
+        redraw_preferences()
+
+    def cancel(self, context):
+        #the window was closed or a file loaded, the worker finishes the build unobserved
+        self.finish(context)
+
+    def modal(self, context, event):
+        from .build import Build, cancel_build, redraw_preferences
+
+        if event.type == 'ESC' and event.value == 'PRESS' and not self.cancelling:
+            #once, the worker's exit event finishes the operator
+            self.cancelling = True
+            cancel_build()
+            return {'RUNNING_MODAL'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        for e in Build.worker.poll():
+            if e.get("id", self.id) != self.id:
+                continue
+
+            if e["event"] == "progress":
+                Build.done = e["done"]
+                Build.total = e["total"]
+                if context.workspace is not None:
+                    context.workspace.status_text_set(
+                        f"Documenting {self.module_name}: page {e['done'] + 1} of {e['total']}, {e['module']}")
+                redraw_preferences()
+
+            elif e["event"] == "done":
+                self.finish(context)
+                self.report_done(e["rendered"], e["skipped"], e["removed"])
+                from .watch import watch_docs, unwatch_docs
+                if self.watch:
+                    watch_docs(self.module_name, self.path, render_workers(context))
+                else:
+                    unwatch_docs(self.module_name)
+                if self.server:
+                    serve(self.module_name, self.path, self.port, live=self.watch)
+                return {'FINISHED'}
+
+            elif e["event"] == "error":
+                self.finish(context)
+                print(e.get("traceback", ""))
+                self.report({'ERROR'}, f"Documentation failed: {e['message']}")
+                return {'CANCELLED'}
+
+            elif e["event"] == "exit":
+                self.finish(context)
+                self.report({'WARNING'}, "Documentation cancelled" if e["code"] else "Documentation worker exited")
+                return {'CANCELLED'}
+
+        return {'PASS_THROUGH'}
+
+class CancelDocumentationOperator(bpy.types.Operator):
+    """Cancel the running documentation build"""
+    bl_idname = "pdoc.cancel"
+    bl_label = "Cancel Documentation"
+    def execute(self, context):
+        from .build import cancel_build
+        cancel_build()
+        return {'FINISHED'}
+
 # Register and add to the "object" menu (required to also use F3 search "Simple Object Operator" for quick access).
 def register():
     bpy.utils.register_class(DocumentationOperator)
+    bpy.utils.register_class(CancelDocumentationOperator)
     bpy.utils.register_class(KillServerOperator)
     bpy.utils.register_class(PdocInstallOperator)
 
 def unregister():
+    from . import server
+    from .build import stop_worker
+    from .watch import unwatch_docs
+    unwatch_docs()
+    stop_worker()
+    server.stop()
+    bpy.utils.unregister_class(CancelDocumentationOperator)
     bpy.utils.unregister_class(KillServerOperator)
     bpy.utils.unregister_class(DocumentationOperator)
     bpy.utils.unregister_class(PdocInstallOperator)
@@ -0,0 +1,124 @@
+"""Documentation builds in a worker process.
+
+The worker is a background Blender running worker.py, so documenting an
+addon imports it outside of the running session and rendering doesn't block
+the UI. The worker is kept running between builds, which saves starting
+Blender and importing the addon again, and is killed to cancel a build.
+"""
+
+import os
+import json
+import queue
+import threading
+import subprocess
+
+import bpy
+
+from .worker import MARKER
+
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+
+
+class DocWorker():
+
+    def __init__(self, package):
+        self.package = package
+        self.process = None
+        self.events = None
+        self.next_id = 0
+
+    def start(self):
+        cmd = [bpy.app.binary_path, "--background", "--python", WORKER, "--", self.package]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, encoding="utf-8", errors="replace", bufsize=1)
+        #every process gets its own queue, so events of a killed one don't leak into the next
+        self.events = queue.Queue()
+        threading.Thread(target=self.read, args=(self.process, self.events), daemon=True).start()
+
+    @staticmethod
+    def read(process, events):
+        for line in process.stdout:
+            if line.startswith(MARKER):
+                try:
+                    events.put(json.loads(line[len(MARKER):]))
+                except ValueError:
+                    pass
+            else:
+                #output of Blender and pdoc in the worker
+                print(line, end="")
+        events.put({"event": "exit", "code": process.wait()})
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def send(self, command):
+        self.process.stdin.write(json.dumps(command) + "\n")
+        self.process.stdin.flush()
+
+    def generate(self, module, output, workers=1, precompile=True):
+        """Queue a build, returns its id which the events of the build carry."""
+        if not self.alive():
+            self.start()
+        self.next_id += 1
+        self.send({"cmd": "generate", "id": self.next_id, "module": module, "output": str(output),
+                   "workers": workers, "precompile": precompile})
+        return self.next_id
+
+    def poll(self):
+        """Return the events received since the last call."""
+        events = []
+        if self.events is not None:
+            while True:
+                try:
+                    events.append(self.events.get_nowait())
+                except queue.Empty:
+                    break
+        return events
+
+    def stop(self, kill=False):
+        if not self.alive():
+            return
+        if kill:
+            self.process.kill()
+            return
+        try:
+            self.send({"cmd": "quit"})
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class Build():
+    #the running build, shown in the extensions list
+    module = ""
+    done = 0
+    total = 0
+    worker = None
+
+
+def get_worker():
+    if Build.worker is None:
+        #the addon package, the worker imports this subpackage from it
+        Build.worker = DocWorker(__package__.rpartition(".")[0])
+    return Build.worker
+
+
+def cancel_build():
+    if Build.worker is not None:
+        Build.worker.stop(kill=True)
+    #also when whoever waits for the build is gone, e.g. the window was closed
+    Build.module = ""
+
+
+def stop_worker():
+    if Build.worker is not None:
+        Build.worker.stop()
+        Build.worker = None
+    Build.module = ""
+
+
+def redraw_preferences():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'PREFERENCES':
+                area.tag_redraw()
@@ -0,0 +1,405 @@
+"""Incremental rendering of the documentation of an addon.
+
+A manifest in the output directory records per module the hash of its
+source, the addon modules it imports and the hash of the rendered page.
+On regeneration only the pages of modules whose source changed are
+rendered again, together with the pages of the modules importing them,
+since links into a module depend on its contents, and the parents of added
+or removed modules, whose navigation lists them. Modules are only imported
+and inspected by pdoc once their page or search entries are needed.
+
+The search index is merged from per module entries kept next to the
+manifest, so it is only rebuilt for changed modules, and index.html only
+depends on the names of the modules. Pages can be rendered by a pool of
+forked processes, which also return the search entries of their modules.
+"""
+
+import os
+import ast
+import sys
+import json
+import hashlib
+from collections.abc import Mapping
+
+MANIFEST = ".devutils_docs.json"
+SEARCH_CACHE = ".devutils_search.json"
+MANIFEST_VERSION = 1
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return content_hash(f.read())
+    except OSError:
+        return None
+
+
+def module_imports(name, path, names):
+    """Return the modules of names imported by the module name at path."""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return []
+
+    package = name if os.path.basename(path) == "__init__.py" else name.rpartition(".")[0]
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                found.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                base = base + "." + node.module if node.module else base
+            else:
+                base = node.module or ""
+            found.add(base)
+            #from package import submodule
+            for alias in node.names:
+                found.add(base + "." + alias.name)
+
+    return sorted(m for m in found if m in names and m != name)
+
+
+def page_path(output_directory, name):
+    return os.path.join(output_directory, *name.split(".")) + ".html"
+
+
+class LazyModules(Mapping):
+    """The all_modules mapping pdoc renders with, inspecting modules on first access.
+    Pages only look up the modules they link into, names are known upfront."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.known = set(self.names)
+        self.loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self.known:
+            raise KeyError(name)
+        module = self.loaded.get(name)
+        if module is None:
+            from pdoc import doc
+            module = self.loaded[name] = doc.Module.from_name(name)
+        return module
+
+    def __contains__(self, name):
+        return name in self.known
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def write_page(path, html):
+    data = html.encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return content_hash(data)
+
+
+def public_filter(all_modules):
+    """Return the is_public test pdoc's search index uses, taken from the module template."""
+    import types
+    from pdoc import doc, render
+
+    template = render.env.get_template("module.html.jinja2")
+    ctx = template.new_context({"module": doc.Module(types.ModuleType("")), "all_modules": all_modules})
+    for _ in template.root_render_func(ctx):
+        pass
+
+    return lambda x: bool(ctx["is_public"](x).strip())
+
+
+def search_js(documents, precompile=True):
+    """Return search.js of documents. Without precompile the browser builds the
+    index when the search is first used, which saves running node."""
+    from pathlib import Path
+    from pdoc import render, search
+
+    if precompile:
+        compile_js = Path(render.env.get_template("build-search-index.js").filename)
+        index = search.precompile_index(documents, compile_js)
+    else:
+        index = json.dumps(documents)
+    return render.env.get_template("search.js.jinja2").render(search_index=index)
+
+
+def module_sources(module_name):
+    """Return module name -> source file of the modules pdoc documents for module_name."""
+    import importlib.util
+    from pdoc import extract
+    from ..sources import iter_module_files
+
+    files = dict(iter_module_files(module_name))
+    sources = {}
+    for name in extract.walk_specs([module_name]):
+        path = files.get(name)
+        if path is None:
+            try:
+                spec = importlib.util.find_spec(name)
+            except ValueError:
+                #imported, but its file was removed
+                continue
+            if spec is None:
+                continue
+            path = spec.origin if spec.has_location else None
+        sources[name] = path
+    return sources
+
+
+def forget_removed(module_name):
+    """Drop the imported submodules of module_name whose file was removed,
+    they can't be reloaded and would still be found in their package."""
+    for name in [n for n in sys.modules if n.startswith(module_name + ".")]:
+        module = sys.modules[name]
+        origin = getattr(module, "__file__", None)
+        if origin is None or os.path.exists(origin):
+            continue
+        del sys.modules[name]
+        parent, _, child = name.rpartition(".")
+        if getattr(sys.modules.get(parent), child, None) is module:
+            delattr(sys.modules[parent], child)
+
+
+def plan(sources, manifest, output_directory):
+    """Return the names of the modules whose pages have to be rendered, with
+    the current hash and imports of every module."""
+    names = set(sources)
+    old = manifest["modules"]
+    modules = {}
+    for name, path in sources.items():
+        h = file_hash(path) if path else None
+        previous = old.get(name)
+        if previous is not None and h is not None and previous["hash"] == h and set(old) == names:
+            #only parsed again if the module or the names it could import changed
+            imports = previous["imports"]
+        else:
+            imports = module_imports(name, path, names) if path else []
+        modules[name] = {"hash": h, "imports": imports}
+
+    if set(old) == names:
+        added = removed = set()
+    else:
+        added = names - set(old)
+        removed = set(old) - names
+        if (len(old) > 1) != (len(names) > 1):
+            #the search box is only shown with more than one module
+            return set(names), modules
+
+    changed = set()
+    for name, entry in modules.items():
+        previous = old.get(name)
+        if (previous is None or entry["hash"] is None or previous["hash"] != entry["hash"] or
+                file_hash(page_path(output_directory, name)) != previous.get("page")):
+            changed.add(name)
+
+    stale = set(changed)
+    for name, entry in modules.items():
+        if changed.intersection(entry["imports"]):
+            stale.add(name)
+    for name in added | removed:
+        parent = name.rpartition(".")[0]
+        if parent in names:
+            stale.add(parent)
+    return stale, modules
+
+
+class Pages():
+    #what forked render processes inherit
+    all_modules = None
+    output_directory = ""
+    search = False
+
+
+def render_pages(names):
+    """Render the pages of names, in a forked process.
+    Returns name -> (page hash, search entries or None)."""
+    from pdoc import render, search
+
+    all_modules = Pages.all_modules
+    is_public = public_filter(all_modules) if Pages.search else None
+    docformat = render.env.globals["docformat"]
+
+    results = {}
+    for name in names:
+        module = all_modules[name]
+        page = write_page(page_path(Pages.output_directory, name), render.html_module(module, all_modules))
+        entries = search.make_index({name: module}, is_public, docformat) if Pages.search else None
+        results[name] = (page, entries)
+    return results
+
+
+def render_parallel(all_modules, names, output_directory, workers, progress=None):
+    """Render the pages of names in a pool of forked processes, see render_pages."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from pdoc import render
+    from ..edit_operator_source.callsites import fork_context
+
+    Pages.all_modules = all_modules
+    Pages.output_directory = output_directory
+    Pages.search = bool(render.env.globals["search"])
+
+    #interleaved, so the chunks get a similar mix of large and small modules
+    n = min(len(names), workers * 4)
+    chunks = [names[i::n] for i in range(n)]
+
+    results = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=fork_context()) as pool:
+            pending = {pool.submit(render_pages, chunk): chunk for chunk in chunks}
+            if progress is not None:
+                progress(0, len(names), chunks[0][0])
+            for future in as_completed(list(pending)):
+                results.update(future.result())
+                del pending[future]
+                #like the sequential path, reported before the next page, here one still rendering
+                if progress is not None and pending:
+                    progress(len(results), len(names), next(iter(pending.values()))[0])
+    finally:
+        Pages.all_modules = None
+    return results
+
+
+def generate(module_name, output_directory, progress=None, workers=1, precompile=True):
+    """Render the pages of module_name and its submodules into output_directory
+    which are out of date. Returns (rendered, skipped, removed) module names.
+
+    progress is called with (pages done, pages to render, module name) before
+    each page. Modules imported already, by this process documenting them
+    before or by Blender enabling the addon, are imported again if any
+    source changed, else their pages would be rendered from the old code
+    but recorded as up to date. With more than one worker the pages are
+    rendered by that many forked processes, where this process may be
+    forked, see callsites.may_fork. Without precompile the search index is
+    left to the browser, for quick rebuilds, and precompiled by the next
+    build with it."""
+    import pdoc
+    from pdoc import extract, render, search
+    from ..profiling import span, count
+    from ..edit_operator_source.callsites import fork_context
+
+    output_directory = str(output_directory)
+    manifest_path = os.path.join(output_directory, MANIFEST)
+    search_path = os.path.join(output_directory, SEARCH_CACHE)
+
+    with span("docs plan", module=module_name):
+        sources = module_sources(module_name)
+        manifest = load_json(manifest_path)
+        if (manifest is None or manifest.get("version") != MANIFEST_VERSION or
+                manifest.get("pdoc") != pdoc.__version__ or manifest.get("root") != module_name):
+            manifest = {"modules": {}}
+        stale, modules = plan(sources, manifest, output_directory)
+
+    if stale and module_name in sys.modules:
+        with span("reload", module=module_name):
+            forget_removed(module_name)
+            extract.invalidate_caches(module_name)
+            sources = module_sources(module_name)
+            stale, modules = plan(sources, manifest, output_directory)
+
+    all_modules = LazyModules(sources)
+    old = manifest["modules"]
+
+    #search entries of the pages rendered in parallel
+    fresh = {}
+
+    rendered = []
+    #the render processes need the imported addon, which only forking passes on
+    if workers > 1 and len(stale) > 1 and fork_context() is not None:
+        with span("pdoc render", modules=len(stale), workers=workers):
+            results = render_parallel(all_modules, [n for n in all_modules if n in stale],
+                                      output_directory, workers, progress)
+        for name in all_modules:
+            if name in results:
+                modules[name]["page"], fresh[name] = results[name]
+                rendered.append(name)
+            else:
+                modules[name]["page"] = old[name]["page"]
+    else:
+        for name in all_modules:
+            if name not in stale:
+                modules[name]["page"] = old[name]["page"]
+                continue
+            if progress is not None:
+                progress(len(rendered), len(stale), name)
+            with span("pdoc render", module=name):
+                modules[name]["page"] = write_page(page_path(output_directory, name),
+                                                   render.html_module(all_modules[name], all_modules))
+            rendered.append(name)
+    count("pages rendered", len(rendered))
+
+    removed = sorted(set(old) - set(sources))
+    for name in removed:
+        try:
+            os.remove(page_path(output_directory, name))
+        except OSError:
+            pass
+
+    names_changed = set(old) != set(sources)
+    index_path = os.path.join(output_directory, "index.html")
+    if names_changed or not os.path.exists(index_path):
+        index = render.html_index(all_modules)
+        if index:
+            write_page(index_path, index)
+
+    search_file = os.path.join(output_directory, "search.js")
+    precompiled = manifest.get("precompiled", True)
+    if render.env.globals["search"] and (rendered or names_changed or not os.path.exists(search_file) or
+                                         precompile and not precompiled):
+        with span("search index"):
+            cached = load_json(search_path) if old else None
+            cached = cached or {}
+            is_public = public_filter(all_modules)
+            docformat = render.env.globals["docformat"]
+
+            documents = []
+            entries = {}
+            for name in all_modules:
+                if fresh.get(name) is not None:
+                    entries[name] = fresh[name]
+                elif name in stale or name not in cached:
+                    entries[name] = search.make_index({name: all_modules[name]}, is_public, docformat)
+                else:
+                    entries[name] = cached[name]
+                documents.extend(entries[name])
+
+            js = search_js(documents, precompile)
+            if js:
+                write_page(search_file, js)
+            save_json(search_path, entries)
+        precompiled = precompile
+
+    save_json(manifest_path, {
+        "version": MANIFEST_VERSION,
+        "pdoc": pdoc.__version__,
+        "root": module_name,
+        "precompiled": precompiled,
+        "modules": modules,
+    })
+
+    skipped = [name for name in all_modules if name not in stale]
+    return rendered, skipped, removed
@@ -0,0 +1,330 @@
+"""Static server for generated documentation, running in a thread of Blender.
+
+Several documentation directories are served on one port, each below its
+own URL prefix. Responses carry an ETag and Last-Modified, so browsers
+revalidate instead of downloading pages again, text assets are sent gzip
+compressed where the client accepts it, from a .gz file next to the asset
+if one is up to date, and connections are kept alive.
+
+Sites mounted live get a script injected into their pages, which listens
+to server-sent events of /<prefix>/__events and reloads the page once the
+documentation was rebuilt, see notify.
+"""
+
+import os
+import sys
+import gzip
+import errno
+import threading
+import mimetypes
+import posixpath
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import unquote, urlsplit, quote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPRESSIBLE = {"text/html", "text/css", "text/javascript", "application/javascript",
+                "application/json", "image/svg+xml", "text/plain"}
+
+#compressed bodies kept in memory, oldest dropped first
+MAX_CACHED = 256
+
+#seconds between comments sent to idle event streams, which notice closed tabs
+KEEPALIVE = 15
+
+LIVE_RELOAD = """<script>
+new EventSource("/%s/__events").addEventListener("version", function (e) {
+    if (e.data !== "%d") location.reload();
+});
+</script>
+"""
+
+
+class Server():
+    httpd = None
+    thread = None
+    #url prefix -> directory
+    roots = {}
+    #(path, mtime_ns, size) -> gzip body
+    compressed = {}
+    lock = threading.Lock()
+    #prefixes whose pages reload on a rebuild, prefix -> build version
+    live = set()
+    versions = {}
+    changed = threading.Condition()
+
+
+def etag(st, version=None, encoding=None):
+    #gzip and identity bodies differ, so their strong tags have to as well
+    tag = "%x-%x" % (st.st_mtime_ns, st.st_size)
+    if version is not None:
+        tag += "-%d" % version
+    if encoding is not None:
+        tag += "-" + encoding
+    return '"%s"' % tag
+
+
+def compress(data):
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def gzip_body(path, st):
+    key = (path, st.st_mtime_ns, st.st_size)
+    with Server.lock:
+        body = Server.compressed.get(key)
+    if body is None:
+        with open(path, "rb") as f:
+            body = compress(f.read())
+        with Server.lock:
+            if len(Server.compressed) >= MAX_CACHED:
+                del Server.compressed[next(iter(Server.compressed))]
+            Server.compressed[key] = body
+    return body
+
+
+def inject(html, prefix, version):
+    script = (LIVE_RELOAD % (quote(prefix), version)).encode()
+    end = html.rfind(b"</body>")
+    if end == -1:
+        return html + script
+    return html[:end] + script + html[end:]
+
+
+class DocsRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "DeveloperUtilitiesDocs"
+
+    def log_message(self, format, *args):
+        pass
+
+    def segments(self):
+        """Return the path segments of the request, None if one could leave the served directory."""
+        path = posixpath.normpath(unquote(urlsplit(self.path).path))
+        parts = []
+        for part in path.split("/"):
+            if not part or part in {".", ".."}:
+                continue
+            #like SimpleHTTPRequestHandler.translate_path, e.g. ..\ or C:\ on windows
+            if os.path.dirname(part) or os.path.splitdrive(part)[0] or os.path.isabs(part):
+                return None
+            parts.append(part)
+        return parts
+
+    def translate(self, parts):
+        """Return (prefix, file path) of the request, None where nothing is mounted."""
+        if not parts or parts[0] not in Server.roots:
+            return None, None
+        root = os.path.realpath(Server.roots[parts[0]])
+
+        filepath = os.path.realpath(os.path.join(root, *parts[1:]))
+        try:
+            inside = os.path.commonpath([root, filepath]) == root
+        except ValueError:
+            #on another drive
+            inside = False
+        if not inside:
+            return parts[0], None
+        if os.path.isdir(filepath):
+            filepath = os.path.join(filepath, "index.html")
+        return parts[0], filepath
+
+    def send_body(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_sites(self):
+        links = "".join(f'<li><a href="/{quote(p)}/index.html">{p}</a></li>' for p in sorted(Server.roots))
+        body = f"<!doctype html><html><body><h1>Documentation</h1><ul>{links}</ul></body></html>".encode()
+        self.send_body(200, body, "text/html; charset=utf-8", [("Cache-Control", "no-cache")])
+
+    def send_events(self, prefix):
+        """Stream the build version of prefix, once on connect and after every rebuild."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        #the stream has no length, it ends with the connection
+        self.send_header("Connection", "close")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+
+        httpd = Server.httpd
+        stopped = lambda: Server.httpd is not httpd or prefix not in Server.roots
+        sent = None
+        try:
+            while not stopped():
+                version = Server.versions.get(prefix, 0)
+                if version != sent:
+                    self.wfile.write(b"event: version\ndata: %d\n\n" % version)
+                    sent = version
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+                with Server.changed:
+                    Server.changed.wait_for(lambda: stopped() or Server.versions.get(prefix, 0) != sent,
+                                            timeout=KEEPALIVE)
+        except OSError:
+            #the tab was closed
+            pass
+
+    def not_modified(self, st, tag):
+        match = self.headers.get("If-None-Match")
+        if match is not None:
+            return tag in [m.strip() for m in match.split(",")] or match.strip() == "*"
+        since = self.headers.get("If-Modified-Since")
+        if since is not None:
+            try:
+                return int(st.st_mtime) <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError, OverflowError):
+                return False
+        return False
+
+    def do_GET(self):
+        if urlsplit(self.path).path in {"", "/"}:
+            return self.send_sites()
+
+        parts = self.segments()
+        if parts is not None and len(parts) == 2 and parts[1] == "__events" and parts[0] in Server.roots:
+            return self.send_events(parts[0])
+
+        prefix, filepath = self.translate(parts)
+        try:
+            st = os.stat(filepath) if filepath else None
+        except OSError:
+            st = None
+        if st is None:
+            return self.send_body(404, b"Not found", "text/plain")
+
+        content_type = mimetypes.guess_type(filepath)[0] or "application/octet-stream"
+        version = Server.versions.get(prefix, 0) if prefix in Server.live and content_type == "text/html" else None
+
+        accepts_gzip = "gzip" in self.headers.get("Accept-Encoding", "") and content_type in COMPRESSIBLE
+        tag = etag(st, version, "gzip" if accepts_gzip else None)
+        headers = [("ETag", tag),
+                   ("Last-Modified", formatdate(st.st_mtime, usegmt=True)),
+                   ("Cache-Control", "no-cache"),
+                   ("Vary", "Accept-Encoding")]
+
+        if self.not_modified(st, tag):
+            self.send_response(304)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if version is not None:
+            #differs per build version, so it isn't cached
+            with open(filepath, "rb") as f:
+                body = inject(f.read(), prefix, version)
+            if accepts_gzip:
+                body = compress(body)
+                headers.append(("Content-Encoding", "gzip"))
+        elif accepts_gzip:
+            body = None
+            try:
+                #generated next to the asset, as long as it isn't older
+                gz = os.stat(filepath + ".gz")
+                if gz.st_mtime_ns >= st.st_mtime_ns:
+                    with open(filepath + ".gz", "rb") as f:
+                        body = f.read()
+            except OSError:
+                pass
+            if body is None:
+                body = gzip_body(filepath, st)
+            headers.append(("Content-Encoding", "gzip"))
+        else:
+            with open(filepath, "rb") as f:
+                body = f.read()
+
+        if content_type.startswith("text/") or content_type.endswith("javascript"):
+            content_type += "; charset=utf-8"
+        self.send_body(200, body, content_type, headers)
+
+    do_HEAD = do_GET
+
+
+def running():
+    return Server.httpd is not None
+
+
+def current_port():
+    return Server.httpd.server_address[1] if Server.httpd is not None else None
+
+
+class DocsHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    #SO_REUSEADDR lets windows bind to a port which is in use
+    allow_reuse_address = sys.platform != "win32"
+
+
+#errors of a port in use or reserved
+BUSY = {errno.EADDRINUSE, errno.EACCES,
+        getattr(errno, "WSAEADDRINUSE", None), getattr(errno, "WSAEACCES", None)} - {None}
+
+
+def start(port):
+    """Start the server on port, or on a free port if it is taken."""
+    try:
+        httpd = DocsHTTPServer(("localhost", port), DocsRequestHandler)
+    except OSError as e:
+        if e.errno not in BUSY and getattr(e, "winerror", None) not in BUSY:
+            raise
+        httpd = DocsHTTPServer(("localhost", 0), DocsRequestHandler)
+
+    Server.httpd = httpd
+    Server.thread = threading.Thread(target=httpd.serve_forever, name="docs server", daemon=True)
+    Server.thread.start()
+
+
+def mount(prefix, directory, port, live=False):
+    """Serve directory below /prefix/, starting the server if necessary. Returns the url.
+    Pages of live sites reload when notify is called for prefix."""
+    if Server.httpd is None:
+        start(port)
+    Server.roots[prefix] = str(directory)
+    if live:
+        Server.live.add(prefix)
+    else:
+        Server.live.discard(prefix)
+    return f"http://localhost:{Server.httpd.server_address[1]}/{quote(prefix)}/index.html"
+
+
+def notify(prefix):
+    """Tell the pages of prefix open in a browser to reload."""
+    with Server.changed:
+        Server.versions[prefix] = Server.versions.get(prefix, 0) + 1
+        Server.changed.notify_all()
+
+
+def wake():
+    #event streams of sites which aren't served anymore end
+    with Server.changed:
+        Server.changed.notify_all()
+
+
+def unmount(prefix):
+    Server.roots.pop(prefix, None)
+    Server.live.discard(prefix)
+    wake()
+    if not Server.roots:
+        stop()
+
+
+def stop():
+    if Server.httpd is not None:
+        Server.httpd.shutdown()
+        Server.httpd.server_close()
+        Server.thread.join(timeout=5)
+    Server.httpd = None
+    Server.thread = None
+    Server.roots = {}
+    Server.compressed = {}
+    Server.live = set()
+    Server.versions = {}
+    wake()
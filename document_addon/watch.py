@@ -0,0 +1,170 @@
+"""Rebuild of the documentation of addons whose sources change.
+
+Watched addons are checked by a timer, which stats their source files and
+the directories holding them, and lists the files again only if one of the
+directories changed. Once no further change was seen for DEBOUNCE seconds,
+the pages which are out of date are rendered by the documentation worker,
+which keeps the addon imported between builds, and pages open in a browser
+are told to reload by the documentation server.
+"""
+
+import os
+import time
+
+import bpy
+
+from ..watch import stamp
+
+# seconds between checks, and without changes before a rebuild starts
+INTERVAL = 0.25
+DEBOUNCE = 0.15
+
+
+class Watched():
+
+    def __init__(self, module_name, path, workers):
+        self.module_name = module_name
+        self.path = str(path)
+        self.workers = workers
+        # path -> stamp
+        self.files = {}
+        self.dirs = {}
+        # time of the last change not built yet, id of the running build
+        self.changed_at = None
+        self.id = None
+        self.started = 0.0
+        self.scan()
+
+    def scan(self):
+        from ..sources import module_location, iter_module_files
+
+        files = [path for name, path in iter_module_files(self.module_name)]
+        dirs = set(module_location(self.module_name)[1] or ())
+        dirs.update(os.path.dirname(path) for path in files)
+
+        self.files = {path: self.files.get(path) or stamp(path) for path in files}
+        self.dirs = {d: stamp(d) for d in dirs}
+
+    def check(self):
+        """Return whether a source file was changed, added or removed since the last check."""
+        changed = False
+        if any(stamp(d) != st for d, st in self.dirs.items()):
+            known = set(self.files)
+            self.scan()
+            changed = set(self.files) != known
+
+        for path, st in self.files.items():
+            current = stamp(path)
+            if current != st:
+                self.files[path] = current
+                changed = True
+        return changed
+
+
+class DocsWatch():
+    # module name -> Watched
+    modules = {}
+
+
+def finish(watched):
+    from .build import Build, redraw_preferences
+
+    watched.id = None
+    Build.module = ""
+    redraw_preferences()
+
+
+def poll(watched):
+    from . import server
+    from .build import Build, redraw_preferences
+
+    for e in Build.worker.poll():
+        if e.get("id", watched.id) != watched.id:
+            continue
+
+        if e["event"] == "progress":
+            Build.done = e["done"]
+            Build.total = e["total"]
+            redraw_preferences()
+
+        elif e["event"] == "done":
+            finish(watched)
+            print(f"Documentation of {watched.module_name} rebuilt, {len(e['rendered'])} pages rendered "
+                  f"in {time.monotonic() - watched.started:.2f}s")
+            if e["rendered"] or e["removed"]:
+                server.notify(watched.module_name)
+
+        elif e["event"] == "error":
+            #the next change is built again
+            finish(watched)
+            print(e.get("traceback", ""))
+            print(f"Documentation of {watched.module_name} failed: {e['message']}")
+
+        elif e["event"] == "exit":
+            finish(watched)
+
+
+def build(watched):
+    from .build import Build, get_worker
+
+    watched.changed_at = None
+    watched.started = time.monotonic()
+    #the search index is precompiled by the next build started by hand
+    watched.id = get_worker().generate(watched.module_name, watched.path, watched.workers, precompile=False)
+    Build.module = watched.module_name
+    Build.done = 0
+    Build.total = 0
+
+
+def watch_tick():
+    from .build import Build
+    from ..profiling import span
+
+    if not DocsWatch.modules:
+        return None
+
+    now = time.monotonic()
+    building = None
+    with span("docs watch"):
+        for watched in DocsWatch.modules.values():
+            if watched.id is not None:
+                building = watched
+            elif watched.check():
+                watched.changed_at = now
+
+    if building is not None:
+        poll(building)
+    elif not Build.module:
+        #one build at a time, others wait for the worker
+        for watched in DocsWatch.modules.values():
+            if watched.changed_at is not None and now - watched.changed_at >= DEBOUNCE:
+                build(watched)
+                break
+
+    #poll closely while something is going on
+    busy = any(w.id is not None or w.changed_at is not None for w in DocsWatch.modules.values())
+    return 0.05 if busy else INTERVAL
+
+
+def watch_docs(module_name, path, workers):
+    """Rebuild the documentation of module_name in path whenever its sources change."""
+    DocsWatch.modules[module_name] = Watched(module_name, path, workers)
+    if not bpy.app.timers.is_registered(watch_tick):
+        bpy.app.timers.register(watch_tick, first_interval=INTERVAL, persistent=True)
+
+
+def unwatch_docs(module_name=None):
+    """Stop watching module_name, or all modules."""
+    from .build import Build
+
+    if module_name is None:
+        watched = list(DocsWatch.modules.values())
+        DocsWatch.modules = {}
+    else:
+        watched = [w for w in [DocsWatch.modules.pop(module_name, None)] if w is not None]
+
+    #a running rebuild finishes in the worker, its events are dropped
+    if any(w.id is not None for w in watched):
+        Build.module = ""
+    if not DocsWatch.modules and bpy.app.timers.is_registered(watch_tick):
+        bpy.app.timers.unregister(watch_tick)
@@ -0,0 +1,80 @@
+"""Documentation worker, run by a background Blender so addons can import bpy:
+
+    blender --background --python worker.py -- <addon package>
+
+Commands are read as JSON lines from stdin, events are written as JSON lines
+to stdout. Blender and pdoc print to stdout as well, so event lines start
+with MARKER. The worker keeps running until it reads a quit command or
+stdin is closed, modules stay imported between commands and are reloaded
+when their sources changed.
+"""
+
+import sys
+import json
+
+MARKER = "@devutils "
+
+
+def send(**event):
+    sys.stdout.write(MARKER + json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+def use_user_site():
+    """Make pdoc importable if it was installed into the user site directory,
+    which Blender leaves out of sys.path."""
+    import site
+
+    user_site = site.getusersitepackages()
+    if user_site not in sys.path:
+        sys.path.append(user_site)
+
+
+def main():
+    import importlib
+    import traceback
+
+    package = sys.argv[sys.argv.index("--") + 1]
+
+    use_user_site()
+
+    try:
+        incremental = importlib.import_module(package + ".document_addon.incremental")
+        import pdoc
+    except Exception as e:
+        #without an id, this fails any build waiting for the worker
+        send(event="error", message=f"Worker could not start: {e}", traceback=traceback.format_exc())
+        return
+
+    send(event="ready")
+
+    for line in sys.stdin:
+        try:
+            command = json.loads(line)
+        except ValueError:
+            continue
+
+        if command.get("cmd") == "quit":
+            break
+        if command.get("cmd") != "generate":
+            continue
+
+        id = command["id"]
+
+        def progress(done, total, module):
+            send(event="progress", id=id, done=done, total=total, module=module)
+
+        try:
+            rendered, skipped, removed = incremental.generate(command["module"], command["output"],
+                                                              progress=progress,
+                                                              workers=command.get("workers", 1),
+                                                              precompile=command.get("precompile", True))
+        except Exception as e:
+            send(event="error", id=id, message=str(e) or type(e).__name__, traceback=traceback.format_exc())
+        else:
+            send(event="done", id=id, output=command["output"],
+                 rendered=rendered, skipped=skipped, removed=removed)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,16 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import bpy
-from bpy.types import Operator
-from bpy.props import StringProperty
+from bpy.types import Operator, Panel, PropertyGroup, UIList
+from bpy.props import StringProperty, IntProperty, EnumProperty, CollectionProperty
 
 
 def draw(**kwargs):
-    from .. import DeveloperUtilitiesPreferences, Pid
-    import site, sys
-    pth = site.getusersitepackages()
-    
+    from ..document_addon import pdoc_available
+    from ..document_addon.build import Build
+    from ..document_addon.server import Server
+    from ..document_addon.watch import DocsWatch
+
     global olddraw
     
     olddraw(**kwargs)
@@ -31,28 +32,22 @@ def draw(**kwargs):
     col_a.label(text="Development")
     col_b.operator("wm.addon_edit_sources", text="Edit Addon Sources", icon='TEXT').module = mod.__name__
 
-    addon_prefs = bpy.context.preferences.addons[DeveloperUtilitiesPreferences.bl_idname].preferences
-
-    try:
-        sys.path.insert(0, pth)
-        import pdoc
-        sys.path.remove(pth)
-
-    except ImportError as e:
-        sys.path.remove(pth)
-
+    if not pdoc_available():
         col_c.operator("pdoc.install",text="Install missing pdoc dependency")
         return 
     
-    if Pid.pid == -1:
-        op = col_c.operator("pdoc.generate", text="Generate Documentation", icon="FILE_TEXT")
-        op.module_name = mod.__name__
-        op.server = addon_prefs.use_server
-        op.port = addon_prefs.server_port
-        op.target = addon_prefs.target_dir
+    if Build.module == mod.__name__:
+        row = col_c.row(align=True)
+        row.label(text=f"Documenting… {Build.done}/{Build.total}" if Build.total else "Documenting…")
+        row.operator("pdoc.cancel", text="", icon='CANCEL')
+    elif mod.__name__ not in Server.roots and mod.__name__ not in DocsWatch.modules:
+        #server, port, target and watch default to the addon preferences
+        col_c.operator("pdoc.generate", text="Generate Documentation", icon="FILE_TEXT").module_name = mod.__name__
     else:
-        op = col_c.operator("pdoc.kill", text="Stop running server")
-        op.pid = Pid.pid
+        row = col_c.row(align=True)
+        row.operator("pdoc.generate", text="", icon="FILE_REFRESH").module_name = mod.__name__
+        text = "Stop watching" if mod.__name__ in DocsWatch.modules else "Stop running server"
+        row.operator("pdoc.kill", text=text).module_name = mod.__name__
 
 
 class WM_OT_addon_edit(Operator):
@@ -68,6 +63,8 @@ class WM_OT_addon_edit(Operator):
     def load_sources(self, context, filepaths):
         import subprocess, os
         from .. import DeveloperUtilitiesPreferences
+        from ..profiling import span, count
+        from ..texts import get_manager, normpath
 
         user_preferences = context.preferences
         addon_prefs = user_preferences.addons[DeveloperUtilitiesPreferences.bl_idname].preferences
@@ -75,13 +72,32 @@ class WM_OT_addon_edit(Operator):
         use_external = addon_prefs.use_external
 
         if not text_editor or not use_external:
-            for path in filepaths:
-                bpy.data.texts.load(path)
-                self.report({'INFO'}, "Loaded source file: %r" % path)
+            manager = get_manager()
+            loaded = 0
+            with span("file read", files=len(filepaths)):
+                for path in filepaths:
+                    text, is_new = manager.open(path, evict=False)
+                    if is_new:
+                        loaded += 1
+                        self.report({'INFO'}, "Loaded source file: %r" % path)
+            count("texts loaded", loaded)
+
+            #make room for the new sources, but never close one of them
+            manager.evict(protect={normpath(p) for p in filepaths})
+            if loaded < len(filepaths):
+                self.report({'INFO'}, "%d source files were already loaded" % (len(filepaths) - loaded))
              
             return {'FINISHED'}
 
         else:
+            from ..watch import get_watcher
+
+            #copies already loaded in Blender follow the external edits
+            manager = get_manager()
+            for path in filepaths:
+                if manager.find(path) is not None:
+                    get_watcher().watch(path)
+
             text_editor = os.path.abspath(text_editor)
             cmd = [text_editor] + filepaths
     
@@ -101,7 +117,13 @@ class WM_OT_addon_edit(Operator):
     def path_from_addon(module):
         import os
         import addon_utils
+        from ..sources import get_addon_index
 
+        path, isdir = get_addon_index().lookup(module)
+        if path is not None:
+            return path, isdir
+
+        #not in one of the addon directories, ask addon_utils as before
         for mod in addon_utils.modules():
             if mod.__name__ == module:
                 filepath = mod.__file__
@@ -114,28 +136,257 @@ class WM_OT_addon_edit(Operator):
 
     def execute(self, context):
         import os
+        from .. import DeveloperUtilitiesPreferences
+        from ..profiling import span
+        from ..texts import get_manager
+        from .loading import collect_sources, split_patterns, entry_module, start_loading
+        from .symbols import set_addon_files
+
+        addon_prefs = context.preferences.addons[DeveloperUtilitiesPreferences.bl_idname].preferences
 
-        path, isdir = WM_OT_addon_edit.path_from_addon(self.module)
+        with span("discovery"):
+            path, isdir = WM_OT_addon_edit.path_from_addon(self.module)
         if path is None:
             self.report({'WARNING'}, "Addon path %r could not be found" % path)
             return {'CANCELLED'}
 
-        filepaths = []
-        # walk through dir recursively to find all py files and load them
+        # walk through dir recursively to find all wanted py files
         if isdir:
-             for root, dirs, files in os.walk(path):
-                 for file in files:
-                     if file.endswith(".py"):
-                        filepath = os.path.join(root, file);
-                        filepaths.append(filepath)
+            with span("discovery"):
+                filepaths, too_large = collect_sources(path,
+                                                       split_patterns(addon_prefs.source_include),
+                                                       split_patterns(addon_prefs.source_exclude),
+                                                       addon_prefs.source_max_kb * 1024)
+            if too_large:
+                self.report({'INFO'}, "Skipped %d source files larger than %d KB" % (too_large, addon_prefs.source_max_kb))
         else:
              filepaths = [path]
 
-        return self.load_sources(context, filepaths)
+        #symbols are indexed once they are looked up
+        set_addon_files(self.module, path, filepaths)
+
+        use_external = addon_prefs.use_external and context.preferences.filepaths.text_editor
+        if use_external or addon_prefs.source_loading == 'ALL':
+            return self.load_sources(context, filepaths)
+
+        #load the entry module right away, the rest in the background or on demand
+        entry = entry_module(path, isdir)
+        first = [p for p in filepaths if p == entry] or filepaths[:1]
+        result = self.load_sources(context, first)
+
+        manager = get_manager()
+        rest = [p for p in filepaths if p not in first and manager.find(p) is None]
+
+        if addon_prefs.source_loading == 'PLACEHOLDERS':
+            set_placeholders(context.window_manager, self.module, path if isdir else os.path.dirname(path), rest)
+            self.report({'INFO'}, "%d more source files listed in the Addon Sources panel" % len(rest))
+        else:
+            start_loading(self.module, rest)
+            self.report({'INFO'}, "Loading %d more source files in the background" % len(rest))
+
+        return result
+
+
+class Placeholders():
+    #module whose sources are listed in window_manager.addon_sources
+    module = ""
+
+
+def set_placeholders(wm, module, root, paths):
+    import os
+
+    Placeholders.module = module
+    wm.addon_sources.clear()
+    wm.addon_sources_index = 0
+    for path in paths:
+        item = wm.addon_sources.add()
+        item.name = os.path.relpath(path, root)
+        item.path = path
+
+
+class AddonSourceEntry(PropertyGroup):
+
+    path : StringProperty(
+            name="Path",
+            description="",
+            default=""
+            )
+
+
+class TEXT_UL_addon_sources(UIList):
+    bl_idname = "TEXT_UL_addon_sources"
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        layout.operator("text.addon_source_open", text=item.name, icon='FILE_SCRIPT', emboss=False).path = item.path
+
+
+class TEXT_OT_addon_source_open(Operator):
+    "Load and show an addon source file listed as placeholder"
+    bl_idname = "text.addon_source_open"
+    bl_label = "Open Addon Source"
+
+    path : StringProperty(
+            name="Path",
+            description="",
+            )
+
+    def execute(self, context):
+        from ..texts import get_manager
+
+        text, loaded = get_manager().open(self.path)
+        if context.space_data is not None and context.space_data.type == 'TEXT_EDITOR':
+            context.space_data.text = text
+
+        sources = context.window_manager.addon_sources
+        for i, item in enumerate(sources):
+            if item.path == self.path:
+                sources.remove(i)
+                break
+
+        return {'FINISHED'}
+
+
+class TEXT_OT_addon_sources_load(Operator):
+    "Load all addon source files still listed as placeholders in the background"
+    bl_idname = "text.addon_sources_load"
+    bl_label = "Load All"
+
+    def execute(self, context):
+        from .loading import start_loading
+
+        wm = context.window_manager
+        start_loading(Placeholders.module, [item.path for item in wm.addon_sources])
+        wm.addon_sources.clear()
+        return {'FINISHED'}
+
+
+class TEXT_OT_addon_sources_cancel(Operator):
+    "Stop loading addon sources, or forget the listed placeholders"
+    bl_idname = "text.addon_sources_cancel"
+    bl_label = "Cancel"
+
+    def execute(self, context):
+        from .loading import cancel_loading
+
+        cancel_loading()
+        context.window_manager.addon_sources.clear()
+        Placeholders.module = ""
+        return {'FINISHED'}
+
+
+class SymbolCache():
+    key = None
+    items = []
+    entries = []
+
+def symbol_items(self, context):
+    from .symbols import KINDS, current_index
+
+    index = current_index(context)
+    if index is None:
+        return []
+
+    #blender keeps no reference to the item strings, so hold on to them here
+    key = (index.module, index.generation)
+    if key != SymbolCache.key:
+        import os
+        SymbolCache.entries = list(index.symbols())
+        SymbolCache.items = [(str(i), f"{name}  ({KINDS[kind]}, {os.path.basename(path)}:{line})", "")
+                             for i, (name, kind, path, line, column) in enumerate(SymbolCache.entries)]
+        SymbolCache.key = key
+    return SymbolCache.items
+
+
+class TEXT_OT_addon_symbol_jump(Operator):
+    "Jump to the definition of a class, function, bl_idname or property of the addon"
+    bl_idname = "text.addon_symbol_jump"
+    bl_label = "Go to Definition"
+    bl_property = "symbol"
+
+    symbol : EnumProperty(
+            name="Symbol",
+            description="",
+            items=symbol_items
+            )
+
+    @classmethod
+    def poll(cls, context):
+        from .symbols import current_index
+        return context.space_data is not None and context.space_data.type == 'TEXT_EDITOR' and \
+            current_index(context) is not None
+
+    def invoke(self, context, event):
+        from .symbols import current_index
+
+        current_index(context).update()
+        context.window_manager.invoke_search_popup(self)
+        return {'PASS_THROUGH'}
+
+    def execute(self, context):
+        if not self.symbol:
+            return {'CANCELLED'}
+
+        name, kind, path, line, column = SymbolCache.entries[int(self.symbol)]
+        #same path as the found calls of Edit Operator
+        bpy.ops.text.edit_operator(path=path, line=line, column=column)
+        return {'FINISHED'}
+
+
+class TEXT_PT_addon_sources(Panel):
+    bl_space_type = 'TEXT_EDITOR'
+    bl_region_type = 'UI'
+    bl_label = "Addon Sources"
+    bl_category = "Text"
+
+    @classmethod
+    def poll(cls, context):
+        from .loading import Loading
+        from .symbols import Symbols
+        return bool(Loading.paths) or len(context.window_manager.addon_sources) > 0 or bool(Symbols.indexes)
+
+    def draw(self, context):
+        from .loading import Loading, loading_progress
+
+        layout = self.layout
+        wm = context.window_manager
+
+        layout.operator("text.addon_symbol_jump", icon='VIEWZOOM')
+
+        progress = loading_progress()
+        if progress is not None:
+            layout.label(text=Loading.module)
+            row = layout.row(align=True)
+            row.progress(factor=progress, type='BAR',
+                         text=f"Loading {Loading.next}/{len(Loading.paths)} files")
+            row.operator("text.addon_sources_cancel", text="", icon='CANCEL')
+
+        if len(wm.addon_sources) > 0:
+            row = layout.row(align=True)
+            row.label(text=Placeholders.module)
+            row.operator("text.addon_sources_load")
+            row.operator("text.addon_sources_cancel", text="", icon='X')
+            layout.template_list("TEXT_UL_addon_sources", "", wm, "addon_sources",
+                                 wm, "addon_sources_index", rows=8)
+
+
+classes = (
+    AddonSourceEntry,
+    TEXT_UL_addon_sources,
+    TEXT_OT_addon_source_open,
+    TEXT_OT_addon_sources_load,
+    TEXT_OT_addon_sources_cancel,
+    TEXT_OT_addon_symbol_jump,
+    TEXT_PT_addon_sources,
+)
 
 
 def register():
     bpy.utils.register_class(WM_OT_addon_edit)
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.WindowManager.addon_sources = CollectionProperty(name="Addon Sources",
+                                                               type=AddonSourceEntry)
+    bpy.types.WindowManager.addon_sources_index = IntProperty(name="Active Addon Source")
     import bl_pkg.bl_extension_ui as ui
     
     #re-assign method
@@ -151,4 +402,10 @@ def unregister():
     import bl_pkg.bl_extension_ui 
     bl_pkg.bl_extension_ui.addon_draw_item_expanded = olddraw
 
+    from .loading import cancel_loading
+    cancel_loading()
+    del bpy.types.WindowManager.addon_sources_index
+    del bpy.types.WindowManager.addon_sources
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
     bpy.utils.unregister_class(WM_OT_addon_edit)
@@ -0,0 +1,129 @@
+"""Collection and deferred loading of addon source files.
+
+Sources are filtered by include and exclude patterns and a size limit while
+the addon directory is walked. Only the entry module is loaded right away,
+the remaining files are loaded in small timer driven batches, or are listed
+as placeholders which are read only once they get opened.
+"""
+
+import os
+import time
+import fnmatch
+
+import bpy
+
+
+def split_patterns(text):
+    return [p.strip() for p in text.split(";") if p.strip()]
+
+
+def matches(relpath, name, patterns):
+    # patterns with a slash match the path relative to the addon directory,
+    # others the file or directory name
+    for pattern in patterns:
+        if "/" in pattern:
+            if fnmatch.fnmatch(relpath, pattern):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+
+def collect_sources(path, include, exclude, max_size=0):
+    """Return the files below path matching include but not exclude, and the
+    number of files skipped for being larger than max_size bytes (0 for no limit)."""
+    filepaths = []
+    too_large = 0
+
+    for root, dirs, files in os.walk(path):
+        rel = os.path.relpath(root, path).replace(os.sep, "/")
+        rel = "" if rel == "." else rel + "/"
+
+        # excluded directories are not walked at all
+        dirs[:] = sorted(d for d in dirs if not matches(rel + d, d, exclude))
+
+        for file in sorted(files):
+            relpath = rel + file
+            if not matches(relpath, file, include) or matches(relpath, file, exclude):
+                continue
+            filepath = os.path.join(root, file)
+            if max_size:
+                try:
+                    size = os.path.getsize(filepath)
+                except OSError:
+                    #a dangling link, or removed while walking
+                    continue
+                if size > max_size:
+                    too_large += 1
+                    continue
+            filepaths.append(filepath)
+
+    return filepaths, too_large
+
+
+def entry_module(path, isdir):
+    if isdir:
+        return os.path.join(path, "__init__.py")
+    return path
+
+
+class Loading():
+    #the sources being loaded in the background, if any
+    module = ""
+    paths = []
+    next = 0
+    loaded = 0
+
+
+def load_tick():
+    from ..texts import get_manager, normpath, redraw_text_editors
+    from ..profiling import span, count
+    TICK_BUDGET = 0.02
+
+    manager = get_manager()
+    deadline = time.perf_counter() + TICK_BUDGET
+
+    with span("file read"):
+        while Loading.next < len(Loading.paths):
+            text, is_new = manager.open(Loading.paths[Loading.next], evict=False)
+            Loading.next += 1
+            if is_new:
+                Loading.loaded += 1
+                count("texts loaded")
+            if time.perf_counter() >= deadline:
+                break
+
+    if Loading.next < len(Loading.paths):
+        redraw_text_editors()
+        return 0.0
+
+    #make room for the new sources, but never close one of them
+    manager.evict(protect={normpath(p) for p in Loading.paths})
+    print(f"Loaded {Loading.loaded} source files of {Loading.module}")
+    Loading.paths = []
+    Loading.next = 0
+    redraw_text_editors()
+    return None
+
+
+def start_loading(module, paths):
+    cancel_loading()
+    Loading.module = module
+    Loading.paths = paths
+    Loading.next = 0
+    Loading.loaded = 0
+    if paths:
+        bpy.app.timers.register(load_tick, first_interval=0.0)
+
+
+def cancel_loading():
+    if bpy.app.timers.is_registered(load_tick):
+        bpy.app.timers.unregister(load_tick)
+    Loading.paths = []
+    Loading.next = 0
+
+
+def loading_progress():
+    if not Loading.paths:
+        return None
+    return Loading.next / len(Loading.paths)
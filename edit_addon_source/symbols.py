@@ -0,0 +1,181 @@
+"""Index of the definitions in the source files of an addon.
+
+Classes, functions, methods, bl_idnames and property registrations are
+collected per file in one pass over its syntax tree. Each file is stored
+with its size and modification time, so only changed files are parsed
+again when the index is used.
+"""
+
+import os
+import ast
+
+from ..sources import file_key
+
+# kind -> label shown in the search popup
+KINDS = {
+    'CLASS': "class",
+    'FUNCTION': "function",
+    'METHOD': "method",
+    'IDNAME': "bl_idname",
+    'PROPERTY': "property",
+}
+
+
+def is_property_call(node):
+    #bpy.props.StringProperty(...), StringProperty(...)
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+    return name.endswith("Property")
+
+
+def attribute_name(node):
+    #bpy.types.Scene.my_prop -> "Scene.my_prop"
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Attribute):
+        return node.value.attr + "." + node.attr
+    return None
+
+
+class SymbolCollector(ast.NodeVisitor):
+
+    def __init__(self):
+        self.symbols = []
+        # (name, is class) of the enclosing definitions
+        self.scope = []
+
+    def qualname(self, name):
+        return ".".join([s[0] for s in self.scope] + [name])
+
+    def add(self, name, kind, node):
+        self.symbols.append((name, kind, node.lineno, node.col_offset))
+
+    def in_class(self):
+        return bool(self.scope) and self.scope[-1][1]
+
+    def visit_ClassDef(self, node):
+        self.add(self.qualname(node.name), 'CLASS', node)
+        self.scope.append((node.name, True))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_FunctionDef(self, node):
+        self.add(self.qualname(node.name), 'METHOD' if self.in_class() else 'FUNCTION', node)
+        self.scope.append((node.name, False))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Assign(self, node):
+        if self.in_class():
+            for target in node.targets:
+                if (isinstance(target, ast.Name) and target.id == "bl_idname" and
+                        isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)):
+                    self.add(node.value.value, 'IDNAME', node)
+        elif is_property_call(node.value):
+            for target in node.targets:
+                name = attribute_name(target)
+                if name is not None:
+                    self.add(name, 'PROPERTY', node)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        #name : StringProperty(...) inside operators, panels and property groups
+        if self.in_class() and isinstance(node.target, ast.Name) and is_property_call(node.annotation):
+            self.add(self.qualname(node.target.id), 'PROPERTY', node)
+        self.generic_visit(node)
+
+
+def extract_symbols(tree):
+    """Return (name, kind, line, column) of the definitions in a module, line is 1 based."""
+    collector = SymbolCollector()
+    collector.visit(tree)
+    return collector.symbols
+
+
+def scan_symbols(path):
+    with open(path, "rb") as f:
+        source = f.read()
+    return extract_symbols(ast.parse(source, filename=path))
+
+
+class SymbolIndex():
+
+    def __init__(self, module, root):
+        self.module = module
+        self.root = root
+        self.paths = []
+        # path -> (key, symbols)
+        self.files = {}
+        self.generation = 0
+
+    def set_files(self, paths):
+        self.paths = list(paths)
+        for path in set(self.files) - set(self.paths):
+            del self.files[path]
+            self.generation += 1
+
+    def update(self):
+        """Parse the files which are new or changed since the last update."""
+        from ..profiling import span, count
+
+        with span("symbol index", module=self.module):
+            for path in self.paths:
+                try:
+                    key = file_key(path)
+                except OSError:
+                    if self.files.pop(path, None) is not None:
+                        self.generation += 1
+                    continue
+
+                entry = self.files.get(path)
+                if entry is not None and entry[0] == key:
+                    continue
+
+                try:
+                    symbols = scan_symbols(path)
+                except (SyntaxError, ValueError, OSError):
+                    #keep what was found before the file broke
+                    symbols = entry[1] if entry is not None else []
+                self.files[path] = (key, symbols)
+                self.generation += 1
+                count("files parsed")
+
+    def symbols(self):
+        """Yield (name, kind, path, line, column) of all definitions, in file order."""
+        for path in self.paths:
+            entry = self.files.get(path)
+            if entry is not None:
+                for name, kind, line, column in entry[1]:
+                    yield name, kind, path, line, column
+
+
+class Symbols():
+    #module -> SymbolIndex of the addons opened with Edit Addon Sources
+    indexes = {}
+    #the most recently opened addon
+    module = ""
+
+
+def set_addon_files(module, root, paths):
+    index = Symbols.indexes.get(module)
+    if index is None:
+        index = Symbols.indexes[module] = SymbolIndex(module, root)
+    index.set_files(paths)
+    Symbols.module = module
+
+
+def current_index(context):
+    """Return the index of the addon the text being edited belongs to,
+    else of the addon opened last."""
+    text = getattr(context, "edit_text", None)
+    if text is not None and text.filepath:
+        from ..texts import normpath
+
+        path = normpath(text.filepath)
+        for index in Symbols.indexes.values():
+            root = normpath(index.root)
+            if path == root or path.startswith(root + os.sep):
+                return index
+    return Symbols.indexes.get(Symbols.module)
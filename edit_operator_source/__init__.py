@@ -3,12 +3,12 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import bpy
-import sys
 import inspect
 from bpy.types import (
         Operator,
         Panel,
-        PropertyGroup
+        PropertyGroup,
+        UIList
         )
 from bpy.props import (
         EnumProperty,
@@ -16,104 +16,124 @@ from bpy.props import (
         IntProperty
         )
 
-def list_submodules(package):
-    
-    import pkgutil, importlib
-    
-    """List all submodules of a given package without importing them."""
-    submodules = []
-    path = package.__path__
-    prefix = package.__name__ + '.'
-
-    for _, name, is_pkg in pkgutil.iter_modules(path, prefix):
-        submodules.append(importlib.import_module(name))
-        if is_pkg:
-            submodules.extend(list_submodules(importlib.import_module(name)))
-    return submodules
+def module_files(module):
+    from ..sources import iter_module_files
 
-def parent(i):
-    import ast
-    while hasattr(i, "parent"):
-        if i.parent is None:
-            break
-        if isinstance(i, ast.ClassDef):
-            break
-        if isinstance(i, ast.FunctionDef) and not i.parent is None and not isinstance(i.parent, ast.ClassDef):
-            break
-
-        i = i.parent
-
-    if hasattr(i, "name"):
-        return i.name
-    else:
-        return None
-
-def check_for_calls(a, opname, filepath):
-    #opname is "text.edit_operator"
-    #can be found as is as first arg
-    #or as call with
-    import ast
-
-    calls = []
-    w = list(ast.walk(a))
-    for i in w:
-        for child in ast.iter_child_nodes(i):
-            child.parent = i
-            #print(node)
-
-    for i in w:
-        if isinstance(i, ast.Call):
-            if isinstance(i.func, ast.Attribute):
-                #print("ATTR CALL",ast.unparse(i), ast.unparse(i.func.value), i.func.attr)
-                cls = ast.unparse(i.func.value)
-                nm = i.func.attr
-                #print(cls, nm, opname)
-                if opname == f"{cls}.{nm}".replace("bpy.ops.",""):
-                    p = parent(i)
-                    if p is not None:
-                        print("FOUND", p, filepath, i.lineno, i.col_offset)
-                        call = [opname, p, filepath, i.lineno, i.col_offset]
-                        calls.append(call)
-                
-                if i.func.attr == "operator":
-                    if len(i.args) > 0:
-                        if hasattr(i.args[0], "value"):
-                            val = i.args[0].value
-                            if isinstance(i.args[0].value, ast.Name):
-                                val = ast.unparse(i.args[0].value)  
-                            #print(val, opname, type(val), type(opname), opname == val)  
-                            if opname == val:
-                                p = parent(i)
-                                if p is not None:
-                                    print("FOUND", p, filepath, i.lineno, i.col_offset)
-                                    call = [opname, p , filepath, i.lineno, i.col_offset]
-                                    calls.append(call)
-                        
-            #if isinstance(i.func, ast.Name):
-            #    print("NAME CALL",i.func.id)
-    return calls
-
-def find_calls(module, method_name):
-    import ast
-    calls = []
-    #submodules = walk_module(module,exclude=["sys"],visited=None)
+    files = []
     try: 
-        tree = ast.parse(inspect.getsource(module))
-        filepath = inspect.getfile(module)
-        calls.extend(check_for_calls(tree, method_name, filepath))
+        for name, path in iter_module_files(module):
+            files.append(path)
     except Exception as e:
         print(e)
 
-    try: 
-        submodules = list_submodules(module)
-        for submod in submodules:
-            tree = ast.parse(inspect.getsource(submod))
-            filepath = inspect.getfile(submod)
-            calls.extend(check_for_calls(tree, method_name, filepath))
-    except Exception as e:
-        print(e)
+    return files
+
+def search_files(modules):
+    from ..profiling import span
+
+    files = []
+    with span("discovery"):
+        for module in modules:
+            files.extend(module_files(module))
+    return files
+
+def search_workers(context):
+    import os
+    from .. import DeveloperUtilitiesPreferences
+
+    addon_prefs = context.preferences.addons[DeveloperUtilitiesPreferences.bl_idname].preferences
+    return addon_prefs.search_workers or os.cpu_count() or 1
+
+def search_in_background(context):
+    from .. import DeveloperUtilitiesPreferences
+
+    addon_prefs = context.preferences.addons[DeveloperUtilitiesPreferences.bl_idname].preferences
+    return addon_prefs.search_in_background
+
+def search_modules():
+    import bl_ui, bl_ext
+
+    modules = [bl_ui]
+    for x in dir(bl_ext):
+        if not x.startswith("__"):
+            modules.append(getattr(bl_ext, x))
+    return modules
+
+class Calls():
+    #the last search; its hits are only kept in window_manager.operator_calls,
+    #for the UIList, which only draws the visible rows
+    opname = ""
+    source = None
+    generation = 0
+
+def add_calls(wm, hits):
+    import os
+
+    Calls.generation += 1
+    for c in hits:
+        cl = wm.operator_calls.add()
+        cl.name = c[0]
+        cl.scope = c[1]
+        cl.file = os.path.basename(c[2])
+        cl.label = f"{c[1]} : {cl.file}:{c[3]}"
+        cl.path = c[2]
+        cl.line = c[3]
+        cl.offset = c[4]
+
+def clear_calls(wm, opname="", source=None):
+    Calls.opname = opname
+    Calls.source = source
+    Calls.generation += 1
+    wm.operator_calls.clear()
+    wm.operator_calls_index = 0
+
+class Search():
+    #the call search running in the background, if any
+    job = None
+    status = ""
+
+def search_tick():
+    from ..profiling import span
+    from ..texts import redraw_text_editors
+    TICK_BUDGET = 0.02
+
+    job = Search.job
+    if job is None or job.cancelled:
+        return None
+
+    done = job.step(TICK_BUDGET)
+    wm = bpy.context.window_manager
 
-    return calls
+    with span("panel fill"):
+        if done:
+            #hits were streamed in as they came, order them like a blocking search
+            job.take_new()
+            clear_calls(wm, Calls.opname, Calls.source)
+            add_calls(wm, job.calls())
+        else:
+            add_calls(wm, job.take_new())
+
+    if done:
+        Search.job = None
+        Search.status = job.summary()
+        print(Search.status)
+
+    redraw_text_editors()
+    return None if done else 0.0
+
+def start_search(job):
+    cancel_search()
+    Search.job = job
+    Search.status = ""
+    bpy.app.timers.register(search_tick, first_interval=0.0)
+
+def cancel_search():
+    if Search.job is not None:
+        Search.job.cancel()
+        Search.status = "Search cancelled, " + Search.job.summary()
+        Search.job = None
+    if bpy.app.timers.is_registered(search_tick):
+        bpy.app.timers.unregister(search_tick)
 
 def walk_module(module, exclude=[], visited=None):
     if visited is None:
@@ -152,7 +172,12 @@ def getclazz(opname):
 
 
 def getmodule(opname):
-    addon = True
+    from .locations import get_resolver
+
+    found = get_resolver().lookup(opname, len(operator_idnames()))
+    if found is not None:
+        return found
+
     clazz = getclazz(opname)
 
     if clazz is None:
@@ -160,55 +185,48 @@ def getmodule(opname):
 
     modn = clazz.__module__
 
-    try:
-        line = inspect.getsourcelines(clazz)[1]
-    except IOError:
-        line = -1
-    except TypeError:
-        line = -1
-
     if modn == 'bpy.types':
         mod = 'C operator'
-        addon = False
-    elif modn != '__main__':
-        mod = sys.modules[modn].__file__
     else:
-        addon = False
         mod = modn
 
-    return mod, line, addon
+    return mod, -1, False
+
 
+def operator_idnames():
+    #flat list of all registered operators like "TEXT_OT_edit_operator",
+    #the same list bpy.ops filters for every dir() of its submodules
+    from _bpy import ops as _ops_module
+    return _ops_module.dir()
+
+def get_ops(idnames=None):
+    if idnames is None:
+        idnames = operator_idnames()
 
-def get_ops():
-    import inspect
     op_strings = []
-    tot = 0
-    for op_module_name in dir(bpy.ops):
-        op_module = getattr(bpy.ops, op_module_name)
-        for op_submodule_name in dir(op_module):
-            op = getattr(op_module, op_submodule_name)
-            text = repr(op)
-            if text.split("\n")[-1].startswith("bpy.ops."):
-                text = text.replace("bpy.ops.", "").split("(")[0]
-                op_strings.append(text)
-                tot += 1
-
-    # add own operator name too, since its not loaded yet when this is called
-    
-    # seems our own module's operators are not being loaded / added into  bpy.ops, who knows why...
-    # ...so add manually... 
-    op_strings.append("text.edit_operator")
-    op_strings.append("text.python_api_lookup")
-    op_strings.append("wm.addon_edit_sources")
-    op_strings.append("pdoc.generate")
-    op_strings.append("pdoc.kill")
-    op_strings.append("pdoc.install")
-    #   
+    for id_name in idnames:
+        id_split = id_name.split("_OT_", 1)
+        if len(id_split) == 2:
+            op_strings.append(id_split[0].lower() + "." + id_split[1])
+
     l = sorted(op_strings)
     del op_strings
 
     return [(y, y, "", x) for x, y in enumerate(l)]
 
+class OpsCache():
+    count = -1
+    items = []
+
+def op_items(self, context):
+    #called on every redraw of the search popup, so only rebuild the list
+    #when operators got registered or unregistered since the last call
+    idnames = operator_idnames()
+    if len(idnames) != OpsCache.count:
+        OpsCache.items = get_ops(idnames)
+        OpsCache.count = len(idnames)
+    return OpsCache.items
+
 class OperatorEntry(PropertyGroup):
 
     label : StringProperty(
@@ -234,18 +252,98 @@ class OperatorEntry(PropertyGroup):
             default=-1
             )
 
+    scope : StringProperty(
+            name="Scope",
+            description="Qualified name of the class or function the call is made in",
+            default=""
+            )
+
+    file : StringProperty(
+            name="File",
+            description="File name of the call",
+            default=""
+            )
+
+class FilterCache():
+    key = None
+    flags = []
+    order = []
+
+class TEXT_UL_operator_calls(UIList):
+    bl_idname = "TEXT_UL_operator_calls"
+
+    filter_by : EnumProperty(
+            name="Filter By",
+            description="Which part of a call the filter text is matched against",
+            items=[('FILE', "File", "Match the file name"),
+                   ('SCOPE', "Scope", "Match the class or function the call is made in")],
+            default='FILE'
+            )
+
+    sort_by : EnumProperty(
+            name="Sort By",
+            description="",
+            items=[('ORDER', "Search Order", "Keep the order the calls were found in"),
+                   ('FILE', "File", "Sort by file name and line"),
+                   ('SCOPE', "Scope", "Sort by class or function name")],
+            default='ORDER'
+            )
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        layout.operator_context = 'EXEC_DEFAULT'
+        op = layout.operator("text.edit_operator", text=item.label, emboss=False)
+        op.path = item.path
+        op.line = item.line
+
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_invert", text="", icon='ARROW_LEFTRIGHT')
+        row = layout.row(align=True)
+        row.prop(self, "filter_by", text="")
+        row.prop(self, "sort_by", text="")
+        row.prop(self, "use_filter_sort_reverse", text="", icon='SORT_DESC')
+
+    def filter_items(self, context, data, propname):
+        if not self.filter_name and self.sort_by == 'ORDER':
+            return [], []
+
+        #only recompute when the results or the settings changed, not per redraw
+        key = (Calls.generation, self.filter_name, self.filter_by, self.sort_by)
+        if FilterCache.key == key:
+            return FilterCache.flags, FilterCache.order
+
+        helper = bpy.types.UI_UL_list
+        items = getattr(data, propname)
+        flags = []
+        order = []
+
+        if self.filter_name:
+            attr = "file" if self.filter_by == 'FILE' else "scope"
+            flags = helper.filter_items_by_name(self.filter_name, self.bitflag_filter_item, items, attr)
+
+        if self.sort_by == 'FILE':
+            order = helper.sort_items_helper([(i, (it.file, it.line)) for i, it in enumerate(items)],
+                                             key=lambda x: x[1])
+        elif self.sort_by == 'SCOPE':
+            order = helper.sort_items_helper([(i, (it.scope, it.file, it.line)) for i, it in enumerate(items)],
+                                             key=lambda x: x[1])
+
+        FilterCache.key = key
+        FilterCache.flags = flags
+        FilterCache.order = order
+        return flags, order
+
 class TEXT_OT_EditOperator(Operator):
     bl_idname = "text.edit_operator"
     bl_label = "Edit Operator"
     bl_description = "Opens the source file of operators chosen from Menu"
     bl_property = "op"
 
-    items = get_ops()
-
     op : EnumProperty(
             name="Op",
             description="",
-            items=items
+            items=op_items
             )
 
     path : StringProperty(
@@ -267,83 +365,70 @@ class TEXT_OT_EditOperator(Operator):
             )
 
     def show_text(self, context, path, line, column):
-        found = False
-
-        for t in bpy.data.texts:
-            if t.filepath == path:
-                #switch to the wanted text first
-                context.space_data.text = t
-                ctx = context.copy()
-                ctx['edit_text'] = t
-                with context.temp_override(**ctx):
-                    bpy.ops.text.jump(line=line)
-                    #bpy.ops.text.jump_to_file_at_point(filepath='', line=line, column=column)
-                found = True
-                break
-
-        if (found is False):
+        from ..texts import get_manager
+        from ..watch import get_watcher
+
+        manager = get_manager()
+        t = manager.find(path)
+        if t is None:
+            #texts without a file are referred to by name
+            t = bpy.data.texts.get(path)
+            if t is not None and t.filepath:
+                t = None
+
+        if t is None:
+            t, loaded = manager.open(path)
             self.report({'INFO'},
                         "Opened file: " + path)
-            bpy.ops.text.open(filepath=path)
-            #bpy.ops.text.jump_to_file_at_point(filepath='', line=line, column=column)
+        else:
+            manager.touch(path)
+            if t.filepath:
+                #loaded before, by hand or by an earlier session
+                get_watcher().watch(path)
+
+        #switch to the wanted text first
+        context.space_data.text = t
+        ctx = context.copy()
+        ctx['edit_text'] = t
+        with context.temp_override(**ctx):
             bpy.ops.text.jump(line=line)
+            #bpy.ops.text.jump_to_file_at_point(filepath='', line=line, column=column)
 
     def show_calls(self, context):
-        import bl_ui, bl_ext, bl_pkg
-        import os
-        
-        exclude = []
-
-        #avoid builtin classes, they dont have sources or files at hand
-        #exclude.append("bpy")
-        #exclude.append("bpy.ops")
-        #exclude.append("bpy.types")
-        exclude.append("sys")
-        #exclude.append("bl_ui")
-
-        calls = []
-        calls.extend(find_calls(bl_ui, self.op))
-        d = dir(bl_ext)
-        for x in d:
-            if not x.startswith("__"):
-                mod = getattr(bl_ext, x)
-                calls.extend(find_calls(mod, self.op))
-
-        #print("CALLS", calls)
-        for c in calls:
-            cl = context.scene.calls.add()
-            cl.name = c[0]
-            cl.label = f"{c[1]} : {os.path.basename(c[2])}:{c[3]}"
-            cl.path = c[2]
-            cl.line = c[3]
-            cl.column = c[4]
-            #print("CALL", cl)
+        from .callindex import get_index
+        from .search import CallSearch
+        from ..profiling import span
+
+        files = search_files(search_modules())
+        job = CallSearch(self.op, files, get_index(), search_workers(context))
+
+        if search_in_background(context):
+            start_search(job)
+            return
+
+        job.step()
+        with span("panel fill"):
+            add_calls(context.window_manager, job.calls())
+        self.report({'INFO'}, job.summary())
 
     def invoke(self, context, event):
         context.window_manager.invoke_search_popup(self)
         return {'PASS_THROUGH'}
 
     def execute(self, context):
-        import os
-
         if self.path != "" and self.line != -1:
             #invocation of one of the "found" locations
             self.show_text(context, self.path, self.line, self.column)
             return {'FINISHED'}
         else:
-            context.scene.calls.clear()
+            cancel_search()
             path, line, addon = getmodule(self.op)
 
             if addon:
                 #self.show_text(context, path, line, -1)
 
                 #add convenient "source" button, to toggle back from calls to source
-                c = context.scene.calls.add()
-                c.name = self.op
-                c.label = f"Source : {os.path.basename(path)}:{line}"
-                c.path = path
-                c.line = line
-                c.column = -1
+                clear_calls(context.window_manager, self.op, (path, line))
 
                 self.show_calls(context)
                 context.area.tag_redraw()
@@ -354,12 +439,59 @@ class TEXT_OT_EditOperator(Operator):
                 self.report({'WARNING'},
                             "Found no source file for " + self.op)
 
+                clear_calls(context.window_manager, self.op)
                 self.show_calls(context)
                 context.area.tag_redraw()
 
                 return {'FINISHED'}
 
 
+class TEXT_OT_EditOperatorIndex(Operator):
+    bl_idname = "text.edit_operator_index"
+    bl_label = "Call Index"
+    bl_description = "Verify or rebuild the persistent index of operator calls"
+
+    mode : EnumProperty(
+            name="Mode",
+            description="",
+            items=[('VERIFY', "Verify", "Drop index entries of changed or removed files"),
+                   ('REBUILD', "Rebuild", "Re-parse all sources and index the calls of every operator")],
+            default='VERIFY'
+            )
+
+    def execute(self, context):
+        from .callindex import get_index
+        from .search import CallSearch
+
+        index = get_index()
+
+        if self.mode == 'VERIFY':
+            valid, stale = index.verify()
+            index.save()
+            self.report({'INFO'},
+                        f"Call index: {valid} files valid, {stale} stale entries removed")
+            return {'FINISHED'}
+
+        index.clear()
+        job = CallSearch("", search_files(search_modules()), index, search_workers(context))
+        job.step()
+        self.report({'INFO'},
+                    f"Call index rebuilt, {job.parsed} files parsed")
+        return {'FINISHED'}
+
+
+class TEXT_OT_EditOperatorCancel(Operator):
+    bl_idname = "text.edit_operator_cancel"
+    bl_label = "Cancel Search"
+    bl_description = "Cancel the running search for operator calls"
+
+    def execute(self, context):
+        from ..texts import redraw_text_editors
+        cancel_search()
+        redraw_text_editors()
+        return {'FINISHED'}
+
+
 class TEXT_PT_EditOperatorPanel(Panel):
     bl_space_type = 'TEXT_EDITOR'
     bl_region_type = 'UI'
@@ -372,30 +504,57 @@ class TEXT_PT_EditOperatorPanel(Panel):
         op = layout.operator("text.edit_operator")
         op.path = ""
         op.line = -1
-
-        if len(context.scene.calls) > 0:
+        row = layout.row(align=True)
+        row.operator("text.edit_operator_index", text="Verify Index").mode = 'VERIFY'
+        row.operator("text.edit_operator_index", text="Rebuild Index").mode = 'REBUILD'
+
+        job = Search.job
+        if job is not None:
+            row = layout.row(align=True)
+            row.progress(factor=job.progress, type='BAR', text=job.status())
+            row.operator("text.edit_operator_cancel", text="", icon='CANCEL')
+        elif Search.status:
+            layout.label(text=Search.status)
+
+        if Calls.opname:
+            import os
+
+            wm = context.window_manager
             box = layout.box()
-            box.label(text="Calls of: " + context.scene.calls[0].name)
+            box.label(text="Calls of: " + Calls.opname)
             box.operator_context = 'EXEC_DEFAULT'
-            for c in context.scene.calls:
-                op = box.operator("text.edit_operator", text=c.label)
-                op.path = c.path
-                op.line = c.line
-                op.op = c.name
+            if Calls.source is not None:
+                path, line = Calls.source
+                op = box.operator("text.edit_operator", text=f"Source : {os.path.basename(path)}:{line}")
+                op.path = path
+                op.line = line
+            box.template_list("TEXT_UL_operator_calls", "", wm, "operator_calls",
+                              wm, "operator_calls_index", rows=8)
 
 
 def register():
     bpy.utils.register_class(OperatorEntry)
-    bpy.types.Scene.calls = bpy.props.CollectionProperty(name="Calls",
-                                                         type=OperatorEntry)
+    bpy.types.WindowManager.operator_calls = bpy.props.CollectionProperty(name="Calls",
+                                                                          type=OperatorEntry)
+    bpy.types.WindowManager.operator_calls_index = bpy.props.IntProperty(name="Active Call")
+    bpy.utils.register_class(TEXT_UL_operator_calls)
     bpy.utils.register_class(TEXT_OT_EditOperator)
+    bpy.utils.register_class(TEXT_OT_EditOperatorIndex)
+    bpy.utils.register_class(TEXT_OT_EditOperatorCancel)
     bpy.utils.register_class(TEXT_PT_EditOperatorPanel)
 
 
 def unregister():
+    from .callsites import shutdown_pool
+    cancel_search()
+    shutdown_pool()
     bpy.utils.unregister_class(TEXT_PT_EditOperatorPanel)
+    bpy.utils.unregister_class(TEXT_OT_EditOperatorCancel)
+    bpy.utils.unregister_class(TEXT_OT_EditOperatorIndex)
     bpy.utils.unregister_class(TEXT_OT_EditOperator)
-    del bpy.types.Scene.calls
+    bpy.utils.unregister_class(TEXT_UL_operator_calls)
+    del bpy.types.WindowManager.operator_calls_index
+    del bpy.types.WindowManager.operator_calls
     bpy.utils.unregister_class(OperatorEntry)
 
 
@@ -0,0 +1,116 @@
+"""Persistent index of operator call sites found in addon sources.
+
+Each source file is stored with its size and modification time, so a
+search only has to re-parse the files which changed since they were
+indexed, across Blender sessions. Files the byte prefilter skipped are
+stored without calls, with the operator names they don't contain, so
+searches for those operators skip them without reading them again.
+"""
+
+import os
+import json
+
+from ..sources import file_key
+
+INDEX_VERSION = 4
+
+
+class CallIndex():
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.files = {}
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == INDEX_VERSION:
+            self.files = data["files"]
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        tmp = self.filepath + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(tmp, self.filepath)
+        self.dirty = False
+
+    def clear(self):
+        self.files = {}
+        self.dirty = True
+
+    def calls(self, path, opname):
+        """Return the cached [scope, line, column] calls of opname in path,
+        or None if the file is unknown or changed on disk."""
+        entry = self.files.get(path)
+        if entry is None:
+            return None
+
+        try:
+            key = file_key(path)
+        except OSError:
+            key = None
+
+        if entry["key"] != key:
+            del self.files[path]
+            self.dirty = True
+            return None
+
+        if entry["calls"] is None:
+            #only prefiltered, known to lack some operator names
+            return [] if opname.rpartition(".")[2] in entry["lacks"] else None
+        return entry["calls"].get(opname, [])
+
+    def update(self, path, calls, key=None):
+        """Store the operator to call sites map of all operators called in path."""
+        if key is None:
+            key = file_key(path)
+        self.files[path] = {"key": key, "calls": calls}
+        self.dirty = True
+
+    def lacks(self, path, name, key):
+        """Store that path doesn't contain the operator name part name, as the prefilter found."""
+        entry = self.files.get(path)
+        if entry is None or entry["key"] != key or entry["calls"] is not None:
+            entry = self.files[path] = {"key": key, "calls": None, "lacks": []}
+        if name not in entry["lacks"]:
+            entry["lacks"].append(name)
+        self.dirty = True
+
+    def verify(self):
+        """Drop entries of files which changed or vanished, returns (valid, stale)."""
+        stale = []
+        for path, entry in self.files.items():
+            try:
+                key = file_key(path)
+            except OSError:
+                key = None
+            if entry["key"] != key:
+                stale.append(path)
+
+        for path in stale:
+            del self.files[path]
+
+        if stale:
+            self.dirty = True
+
+        return len(self.files), len(stale)
+
+
+_index = None
+
+def get_index():
+    global _index
+    from .. import cache_path
+
+    if _index is None:
+        _index = CallIndex(cache_path("call_index.json"))
+        _index.load()
+    return _index
@@ -0,0 +1,99 @@
+"""Extraction of operator call sites from python sources.
+
+Every module is visited once and the calls of all operators are collected
+at the same time, either as `bpy.ops.module.name(...)` calls or as the
+idname passed to `layout.operator("module.name")` and its siblings.
+
+Parsing works on file paths and returns plain tuples, so it can be spread
+over a process pool. The parsing code is in standalone/devutils_callsites.py,
+which spawned pool processes import without bpy and without this addon.
+"""
+
+import os
+import sys
+import importlib.util
+
+from ..profiling import span
+
+STANDALONE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "standalone")
+SCANNER = "devutils_callsites"
+
+
+def load_scanner():
+    """Import the parsing module under its top level name, which is how pool
+    processes refer to its functions."""
+    module = sys.modules.get(SCANNER)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(SCANNER, os.path.join(STANDALONE, SCANNER + ".py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[SCANNER] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+scanner = load_scanner()
+
+MMAP_SIZE = scanner.MMAP_SIZE
+LAYOUT_OPERATOR_FUNCS = scanner.LAYOUT_OPERATOR_FUNCS
+attribute_chain = scanner.attribute_chain
+CallSiteCollector = scanner.CallSiteCollector
+extract_calls = scanner.extract_calls
+operator_needle = scanner.operator_needle
+scan_chunk = scanner.scan_chunk
+
+
+def scan_file(path, needle=None):
+    """Parse a source file in this process, see devutils_callsites.scan_file."""
+    return scanner.scan_file(path, needle, span)
+
+
+def may_fork():
+    """Whether a pool may fork this process. Only on linux and in background
+    mode, a Blender with a UI would be copied with its GPU context and threads."""
+    import bpy
+
+    return sys.platform.startswith("linux") and bpy.app.background
+
+
+def fork_context():
+    """Return the fork context for pools whose processes need the state of this
+    one, like imported addons, None where this process may not be forked."""
+    import multiprocessing
+
+    if may_fork() and "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+class Pool():
+    #kept for the session, starting interpreters costs more than small searches
+    executor = None
+    workers = 0
+
+
+def scan_pool(workers):
+    """Return the process pool which runs scan_chunk, started on first use."""
+    import site
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if Pool.executor is not None and Pool.workers == workers:
+        return Pool.executor
+    shutdown_pool()
+
+    context = fork_context()
+    if context is not None:
+        Pool.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    else:
+        #plain interpreters, which find devutils_callsites on their path
+        Pool.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=site.addsitedir, initargs=(STANDALONE,))
+    Pool.workers = workers
+    return Pool.executor
+
+
+def shutdown_pool():
+    if Pool.executor is not None:
+        Pool.executor.shutdown(wait=False, cancel_futures=True)
+        Pool.executor = None
+        Pool.workers = 0
@@ -0,0 +1,157 @@
+"""Source locations of operators.
+
+The idnames of all python operator classes are mapped to their module and
+class in one pass over the operator classes, and the definition lines come
+from parsing each module file once. Both are cached, the table until the
+set of registered operators changes and the lines until their file changes.
+"""
+
+import os
+import ast
+import sys
+
+import bpy
+
+
+def class_lines(tree):
+    """Return a map of qualified class name to its first line, decorators included."""
+    lines = {}
+
+    def visit(body, prefix):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                name = prefix + node.name
+                first = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+                lines.setdefault(name, first)
+                visit(node.body, name + ".")
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                visit(node.body, prefix + node.name + ".<locals>.")
+            elif hasattr(node, "body"):
+                # classes defined in if/try/with blocks
+                for field in ("body", "orelse", "finalbody", "handlers"):
+                    visit(getattr(node, field, []), prefix)
+
+    visit(tree.body, "")
+    return lines
+
+
+def idname_of(cls):
+    idname = getattr(cls, "bl_idname", "")
+    id_split = idname.split("_OT_", 1)
+    if len(id_split) == 2:
+        return id_split[0].lower() + "." + id_split[1]
+    return idname
+
+
+def operator_classes():
+    stack = [bpy.types.Operator, bpy.types.Macro]
+    seen = set()
+    while stack:
+        cls = stack.pop()
+        for sub in cls.__subclasses__():
+            if sub not in seen:
+                seen.add(sub)
+                stack.append(sub)
+                yield sub
+
+
+class LocationResolver():
+
+    def __init__(self):
+        self.count = -1
+        self.table = {}
+        # path -> (size, mtime, lines)
+        self.files = {}
+        # text name -> (source, lines)
+        self.texts = {}
+
+    def refresh(self, count):
+        if count == self.count:
+            return
+
+        table = {}
+        for cls in operator_classes():
+            idname = idname_of(cls)
+            if "." not in idname:
+                continue
+            # registered classes win over unregistered ones of the same idname
+            if idname in table and not getattr(cls, "is_registered", True):
+                continue
+            table[idname] = (cls.__module__, cls.__qualname__)
+
+        self.table = table
+        self.count = count
+
+    def file_lines(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return {}
+
+        cached = self.files.get(path)
+        if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+        try:
+            with open(path, "rb") as f:
+                lines = class_lines(ast.parse(f.read(), filename=path))
+        except (OSError, SyntaxError, ValueError):
+            lines = {}
+
+        self.files[path] = (st.st_size, st.st_mtime_ns, lines)
+        return lines
+
+    def text_lines(self, text):
+        source = text.as_string()
+        cached = self.texts.get(text.name)
+        if cached is not None and cached[0] == source:
+            return cached[1]
+
+        try:
+            lines = class_lines(ast.parse(source))
+        except (SyntaxError, ValueError):
+            lines = {}
+
+        self.texts[text.name] = (source, lines)
+        return lines
+
+    def find_text(self, qualname):
+        # operators registered by running a text block live in __main__,
+        # look for the class in the texts of the current file
+        for text in bpy.data.texts:
+            line = self.text_lines(text).get(qualname)
+            if line is not None:
+                return text.filepath or text.name, line
+        return None, -1
+
+    def lookup(self, opname, count):
+        """Return (path, line, has source) of the operator like getmodule."""
+        self.refresh(count)
+
+        entry = self.table.get(opname)
+        if entry is None:
+            return None
+
+        modn, qualname = entry
+        if modn == '__main__':
+            path, line = self.find_text(qualname)
+            if path is None:
+                return modn, -1, False
+            return path, line, True
+
+        mod = sys.modules.get(modn)
+        path = getattr(mod, "__file__", None)
+        if path is None:
+            return None
+
+        return path, self.file_lines(path).get(qualname, -1), True
+
+
+_resolver = None
+
+def get_resolver():
+    global _resolver
+
+    if _resolver is None:
+        _resolver = LocationResolver()
+    return _resolver
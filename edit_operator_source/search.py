@@ -0,0 +1,188 @@
+"""Time sliced search of operator calls.
+
+A search first looks up every source file in the call index and then parses
+the files which changed, either one by one or in a process pool. Each step
+works until its time budget is used up, so the search can be driven from a
+bpy.app.timers callback while Blender stays interactive.
+"""
+
+import time
+
+from .callsites import scan_file, scan_chunk, operator_needle, scan_pool, shutdown_pool
+from ..profiling import span, count
+
+# files to parse from which on the pool is used, below parsing here is quicker
+POOL_MIN_FILES = 32
+
+
+class CallSearch():
+
+    def __init__(self, opname, files, index, workers=1):
+        self.opname = opname
+        self.files = files
+        self.index = index
+        self.workers = workers
+        self.needle = operator_needle(opname)
+
+        self.checked = 0
+        self.stale = []
+        self.scanned = 0
+        self.found = {}
+        self.new = []
+
+        self.cached = 0
+        self.parsed = 0
+        self.pruned = 0
+
+        self.pool = None
+        self.pending = set()
+        self.chunks = {}
+        self.parsing = False
+        self.finished = False
+        self.cancelled = False
+
+    def add(self, path, calls):
+        hits = [[self.opname, c[0], path, c[1], c[2]] for c in calls]
+        self.found[path] = hits
+        self.new.extend(hits)
+
+    def merge(self, result):
+        path, key, calls, error = result
+        self.scanned += 1
+        if error is not None:
+            print(error)
+            count("files failed")
+        elif calls is None:
+            #files which can't contain the operator are skipped before parsing,
+            #the index remembers that until they change
+            self.pruned += 1
+            count("files pruned")
+            self.index.lacks(path, self.needle.decode("utf-8"), key)
+        else:
+            self.parsed += 1
+            count("files parsed")
+            self.index.update(path, calls, key)
+            self.add(path, calls.get(self.opname, []))
+
+    def start_pool(self):
+        if self.workers <= 1 or len(self.stale) < POOL_MIN_FILES:
+            return
+
+        # small chunks, so hits keep coming in while the pool is busy
+        chunksize = max(1, len(self.stale) // (self.workers * 8))
+        self.pool = scan_pool(self.workers)
+        for i in range(0, len(self.stale), chunksize):
+            chunk = self.stale[i:i + chunksize]
+            future = self.pool.submit(scan_chunk, chunk, self.needle)
+            self.chunks[future] = chunk
+            self.pending.add(future)
+
+    def collect(self, deadline):
+        from concurrent.futures import wait, FIRST_COMPLETED
+        from concurrent.futures.process import BrokenProcessPool
+
+        while self.pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            with span("pool wait"):
+                done, self.pending = wait(self.pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = self.chunks.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [(path, None, None, str(e)) for path in chunk]
+                    if isinstance(e, BrokenProcessPool):
+                        #a worker died, the next search starts a new pool
+                        shutdown_pool()
+                for result in results:
+                    self.merge(result)
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+
+    def step(self, budget=None):
+        """Search for budget seconds, or to the end if None. Returns True when finished."""
+        if self.finished or self.cancelled:
+            return True
+
+        deadline = None if budget is None else time.perf_counter() + budget
+
+        with span("index lookup"):
+            while self.checked < len(self.files):
+                path = self.files[self.checked]
+                self.checked += 1
+                calls = self.index.calls(path, self.opname)
+                if calls is None:
+                    self.stale.append(path)
+                else:
+                    self.cached += 1
+                    count("files from cache")
+                    self.add(path, calls)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return False
+
+        if not self.parsing:
+            self.parsing = True
+            self.start_pool()
+
+        if self.pool is not None:
+            self.collect(deadline)
+        else:
+            while self.scanned < len(self.stale):
+                self.merge(scan_file(self.stale[self.scanned], self.needle))
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+
+        if self.scanned < len(self.stale):
+            return False
+
+        self.finish()
+        return True
+
+    def finish(self):
+        #the pool stays running for the next search
+        self.pool = None
+        with span("index save"):
+            self.index.save()
+        self.finished = True
+
+    def cancel(self):
+        for future in self.pending:
+            future.cancel()
+        self.pool = None
+        self.pending = set()
+        self.chunks = {}
+        self.index.save()
+        self.cancelled = True
+
+    def take_new(self):
+        """Return the hits found since the last call."""
+        new = self.new
+        self.new = []
+        return new
+
+    def calls(self):
+        """Return all hits found so far, in the order of the searched files."""
+        calls = []
+        for path in self.files:
+            calls.extend(self.found.get(path, []))
+        return calls
+
+    @property
+    def progress(self):
+        # looking up the index is cheap compared to parsing, weight it low
+        if self.checked < len(self.files):
+            return 0.1 * self.checked / len(self.files)
+        if not self.stale:
+            return 1.0
+        return 0.1 + 0.9 * self.scanned / len(self.stale)
+
+    def status(self):
+        if self.checked < len(self.files):
+            return f"Checking index {self.checked}/{len(self.files)}"
+        return f"Parsing {self.scanned}/{len(self.stale)} files"
+
+    def summary(self):
+        n = sum(len(hits) for hits in self.found.values())
+        return (f"Found {n} calls of {self.opname}, "
+                f"{self.cached} files from cache, {self.parsed} re-parsed, "
+                f"{self.pruned} pruned")
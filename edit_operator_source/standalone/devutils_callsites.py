@@ -0,0 +1,138 @@
+"""Extraction of operator call sites from python sources, without bpy.
+
+This module imports neither bpy nor the addon, so the plain interpreters
+of a spawned process pool can import it as devutils_callsites, with this
+directory on their path. The addon uses it through callsites.
+"""
+
+import os
+import ast
+import mmap
+from contextlib import nullcontext
+
+
+# files from this size on are searched memory-mapped by the prefilter
+MMAP_SIZE = 1 << 20
+
+# UILayout methods which take an operator idname as first argument
+LAYOUT_OPERATOR_FUNCS = {"operator", "operator_enum", "operator_menu_enum", "operator_menu_hold"}
+
+
+def nospan(name, **args):
+    return nullcontext()
+
+
+def attribute_chain(node):
+    """Return the names of a dotted access like bpy.ops.text.jump, or None."""
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    names.append(node.id)
+    names.reverse()
+    return names
+
+
+class CallSiteCollector(ast.NodeVisitor):
+    """Collects the calls of all operators, together with the qualified name
+    of the class or function they are made in, like "Class.method"."""
+
+    def __init__(self):
+        self.calls = {}
+        # qualified names of the enclosing classes and functions, innermost last
+        self.scopes = []
+
+    def add(self, opname, node):
+        if not self.scopes:
+            # module level code is not reported
+            return
+        self.calls.setdefault(opname, []).append([self.scopes[-1], node.lineno, node.col_offset])
+
+    def visit_scope(self, node):
+        if self.scopes:
+            self.scopes.append(self.scopes[-1] + "." + node.name)
+        else:
+            self.scopes.append(node.name)
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    visit_ClassDef = visit_scope
+    visit_FunctionDef = visit_scope
+    visit_AsyncFunctionDef = visit_scope
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Attribute):
+            if func.attr in LAYOUT_OPERATOR_FUNCS:
+                arg = None
+                if node.args:
+                    arg = node.args[0]
+                else:
+                    for kw in node.keywords:
+                        if kw.arg == "operator":
+                            arg = kw.value
+                            break
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    self.add(arg.value, node)
+
+            chain = attribute_chain(func)
+            if chain is not None and len(chain) == 4 and chain[0] == "bpy" and chain[1] == "ops":
+                self.add(f"{chain[2]}.{chain[3]}", node)
+
+        self.generic_visit(node)
+
+
+def extract_calls(tree):
+    """Return a map of operator idname to [scope, line, column] call sites in the tree."""
+    collector = CallSiteCollector()
+    collector.visit(tree)
+    return collector.calls
+
+
+def contains(f, needle, size):
+    if size >= MMAP_SIZE:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm.find(needle) != -1, None
+    source = f.read()
+    return needle in source, source
+
+
+def scan_file(path, needle=None, span=nospan):
+    """Parse a source file, returns (path, [size, mtime], calls, error).
+
+    If a needle is given, files whose bytes don't contain it are not parsed
+    and returned with their key, but with both calls and error set to None. The phases are timed
+    with span, if given."""
+    try:
+        with span("file read"):
+            st = os.stat(path)
+            with open(path, "rb") as f:
+                source = None
+                if needle:
+                    found, source = contains(f, needle, st.st_size)
+                    if not found:
+                        return path, [st.st_size, st.st_mtime_ns], None, None
+                if source is None:
+                    f.seek(0)
+                    source = f.read()
+        with span("parse"):
+            tree = ast.parse(source, filename=path)
+        with span("match"):
+            calls = extract_calls(tree)
+    except (OSError, SyntaxError, ValueError) as e:
+        return path, None, None, str(e)
+
+    return path, [st.st_size, st.st_mtime_ns], calls, None
+
+
+def scan_chunk(paths, needle):
+    return [scan_file(path, needle) for path in paths]
+
+
+def operator_needle(opname):
+    """Bytes every source calling the operator must contain: its name part,
+    which appears literally in both bpy.ops.module.name and "module.name"."""
+    name = opname.rpartition(".")[2]
+    return name.encode("utf-8") if name else None
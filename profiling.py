@@ -0,0 +1,122 @@
+"""Phase timing of the addon's own operators.
+
+Code is instrumented with `with span("parse"):` blocks and `count()` calls.
+While profiling is disabled span() hands out one shared no-op context
+manager, so instrumented code only pays a function call. Recorded spans are
+summed up per phase as they end, so the summary drawn in the preferences
+doesn't depend on the number of spans, and can be exported in the Chrome
+trace event format, which chrome://tracing and Perfetto load.
+
+Spans recorded inside process pool workers stay in those processes, the
+parent only sees the time it waited for them.
+"""
+
+import os
+import json
+import time
+import threading
+
+# oldest spans are dropped beyond this many
+MAX_EVENTS = 200000
+
+
+class Profile():
+    enabled = False
+    events = []
+    counters = {}
+    #name -> [calls, total seconds, max seconds], kept as spans end
+    phases = {}
+
+
+class NullSpan():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span():
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        end = time.perf_counter()
+        events = Profile.events
+        events.append((self.name, self.start, end - self.start, threading.get_ident(), self.args))
+        if len(events) > MAX_EVENTS:
+            del events[:len(events) - MAX_EVENTS]
+
+        phase = Profile.phases.get(self.name)
+        if phase is None:
+            phase = Profile.phases[self.name] = [0, 0.0, 0.0]
+        phase[0] += 1
+        phase[1] += end - self.start
+        if end - self.start > phase[2]:
+            phase[2] = end - self.start
+        return False
+
+
+def span(name, **args):
+    if not Profile.enabled:
+        return NULL_SPAN
+    return Span(name, args)
+
+
+def count(name, n=1):
+    if Profile.enabled:
+        Profile.counters[name] = Profile.counters.get(name, 0) + n
+
+
+def enable(enabled=True):
+    Profile.enabled = enabled
+
+
+def clear():
+    Profile.events = []
+    Profile.counters = {}
+    Profile.phases = {}
+
+
+def summary():
+    """Return (name, calls, total seconds, max seconds) per phase, slowest first.
+    Phases count every span since the last clear, also those dropped from the trace."""
+    rows = [(name, calls, total, longest) for name, (calls, total, longest) in list(Profile.phases.items())]
+    rows.sort(key=lambda r: r[2], reverse=True)
+    return rows
+
+
+def export_chrome_trace(filepath):
+    pid = os.getpid()
+    origin = min((e[1] for e in Profile.events), default=0.0)
+
+    trace = []
+    for name, start, duration, tid, args in Profile.events:
+        trace.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": pid,
+            "tid": tid,
+            "args": {k: str(v) for k, v in args.items()},
+        })
+
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace,
+                   "displayTimeUnit": "ms",
+                   "otherData": {"counters": Profile.counters}}, f)
+
+    return len(trace)
@@ -4,6 +4,46 @@
 
 import bpy
 
+class Lookup():
+    #results of the last offline search
+    query = ""
+    results = []
+    #(identifier, entry or None, candidates) of the last looked up selection
+    resolved = []
+
+def search_api(self, context):
+    from .apiindex import get_api_index
+    from ..profiling import span
+
+    with span("api search"):
+        index = get_api_index()
+        Lookup.query = self.api_search
+        Lookup.results = [index.entry(i) for i in index.search(self.api_search)]
+
+def selected_text(context):
+    #extract selected string from currently open text
+    #from current line and character till select_end_line and character
+    text = context.edit_text
+    if text is None:
+        return None
+
+    start = (text.current_line_index, text.current_character)
+    end = (text.select_end_line_index, text.select_end_character)
+
+    #end of selection can be before its beginning, so keep correct order
+    if end < start:
+        start, end = end, start
+    (ls, cs), (le, ce) = start, end
+
+    lines = text.lines
+    if ls == le:
+        return lines[ls].body[cs:ce]
+
+    #slice the lines once and join, instead of growing a string per line
+    return "\n".join([lines[ls].body[cs:]] +
+                     [l.body for l in lines[ls + 1:le]] +
+                     [lines[le].body[:ce]])
+
 class UtilityPanel(bpy.types.Panel):
     """Utility Panel in the Text Editor ui region"""
     bl_label = "Python API Lookup"
@@ -14,70 +54,145 @@ class UtilityPanel(bpy.types.Panel):
     bl_category = "Text"
 
     def draw(self, context):
+        from .apiindex import KINDS
+
         layout = self.layout
         layout.operator("text.python_api_lookup", text="Find Text in Python API")
+        layout.operator("text.python_api_resolve")
         layout.operator("screen.userpref_show")
 
+        row = layout.row(align=True)
+        row.prop(context.window_manager, "api_search", text="", icon='VIEWZOOM')
+        row.operator("text.python_api_index", text="", icon='FILE_REFRESH')
+
+        if Lookup.resolved:
+            self.draw_resolved(layout)
+
+        if Lookup.query and not Lookup.results:
+            layout.label(text="Nothing found")
+
+        col = layout.column(align=True)
+        for name, kind, detail, description in Lookup.results:
+            row = col.row(align=True)
+            row.label(text=name + detail if kind in {'FUNCTION', 'OPERATOR'} else name, icon=KINDS[kind])
+            op = row.operator("text.python_api_lookup", text="", icon='URL', emboss=False)
+            op.query = name
+            op.online = True
+            if description:
+                col.label(text=description if kind != 'PROPERTY' else f"{detail}: {description}")
+            elif kind == 'PROPERTY':
+                col.label(text=detail)
+            col.separator()
+
+    def draw_resolved(self, layout):
+        from .apiindex import KINDS
+
+        box = layout.box()
+        row = box.row()
+        row.label(text=f"{len(Lookup.resolved)} identifiers in selection")
+        row.operator("text.python_api_resolve", text="", icon='X', emboss=False).clear = True
+
+        col = box.column(align=True)
+        for identifier, entry, candidates in Lookup.resolved:
+            split = col.split(factor=0.4, align=True)
+            split.label(text=identifier)
+            if entry is None:
+                split.label(text="not found", icon='QUESTION')
+                continue
+            name, kind, detail, description = entry
+            if candidates > 1:
+                name = f"{name} (+{candidates - 1})"
+            row = split.row(align=True)
+            row.label(text=f"{name}  {detail}", icon=KINDS[kind])
+            op = row.operator("text.python_api_lookup", text="", icon='URL', emboss=False)
+            op.query = entry[0]
+            op.online = True
+
+class APIResolveOperator(bpy.types.Operator):
+    """Look up all dotted identifiers of the selection in the offline API index"""
+    bl_idname = "text.python_api_resolve"
+    bl_label = "Look Up Identifiers in Selection"
+
+    clear : bpy.props.BoolProperty(
+            name="Clear",
+            description="Remove the results table",
+            default=False
+            )
+
+    def execute(self, context):
+        from .apiindex import get_api_index, identifiers
+        from ..profiling import span
+
+        if self.clear:
+            Lookup.resolved = []
+            return {'FINISHED'}
+
+        text = selected_text(context)
+        if text is None:
+            self.report({"ERROR"}, "Please open or create a text in the text editor first")
+            return {'CANCELLED'}
+
+        with span("api resolve"):
+            names = identifiers(text)
+            Lookup.resolved = get_api_index().resolve_all(names)
+
+        found = sum(1 for r in Lookup.resolved if r[1] is not None)
+        self.report({'INFO'}, f"Found {found} of {len(names)} identifiers")
+        return {'FINISHED'}
+
+class APIIndexOperator(bpy.types.Operator):
+    """Collect the offline index of the Python API again, e.g. after addons registered new types"""
+    bl_idname = "text.python_api_index"
+    bl_label = "Rebuild API Index"
+
+    def execute(self, context):
+        from .apiindex import get_api_index
+
+        index = get_api_index(rebuild=True)
+        self.report({'INFO'}, f"Indexed {len(index)} API entries")
+        return {'FINISHED'}
+
 class APILookupOperator(bpy.types.Operator):
     """Tooltip"""
     bl_idname = "text.python_api_lookup"
     bl_label = "API Lookup Operator"
-    
-    def selected_text(self, context):
-        #extract selected string from currently open text
-        #from current line till select_end_line
-        #from current_character till select_end_character
-        #concat
-        text = context.edit_text
-        if text is None:
-            return None
-        
-        body = ''
-        cs = text.current_character
-        ce = text.select_end_character
-        ls = text.current_line_index
-        le = text.select_end_line_index
-        #print(ls, le, cs, ce)
-        
-        #end of selection can be smaller than beginning, so keep correct order
-        if ce < cs:
-            tmp = ce
-            ce = cs
-            cs = tmp
-            
-        if le < ls:
-            tmp = le
-            le = ls
-            ls = tmp
-        
-        for li in range(ls,le+1):
-            l = text.lines[li]
-            if ls == le:
-                body += l.body[cs:ce]
-            elif li == ls:
-                body += l.body[cs:]
-            elif li == le:
-                body += l.body[:ce]             
-            else:
-                body += l.body
-                
-        return body
 
+    query : bpy.props.StringProperty(
+            name="Query",
+            description="Look this up instead of the selected text",
+            default=""
+            )
+
+    online : bpy.props.BoolProperty(
+            name="Online",
+            description="Search the online API documentation instead of the offline index",
+            default=False
+            )
+    
     def execute(self, context):
       
-        text = self.selected_text(context)
+        text = self.query or selected_text(context)
         if text is None:
             self.report({"ERROR"}, "Please open or create a text in the text editor first")
             return {'CANCELLED'}
 
         #print(text)
+
+        if not self.online:
+            #assigning runs the search, the results are shown in the panel
+            context.window_manager.api_search = text
+            if Lookup.results:
+                return {'FINISHED'}
+            self.report({'INFO'}, f"{text!r} not found offline, searching online")
         
         #open browser (2.8+ ?)
         #v = (2, 80, 0) 
+        from urllib.parse import quote_plus
         v = bpy.app.version
         version = str(v[0]) + "." + str(v[1])
         base_url = 'https://docs.blender.org/api/'+version+'/'
-        url = base_url+'search.html?q='+text+'&check_keywords=yes&area=default'
+        #selections may span lines or contain & and #
+        url = base_url+'search.html?q='+quote_plus(text)+'&check_keywords=yes&area=default'
         bpy.ops.wm.url_open(url=url)
         
         return {'FINISHED'}
@@ -88,7 +203,12 @@ def menu_draw(self, context):
     self.layout.operator("text.api_lookup", text="Find Text in Python API")
 
 def register():
+    bpy.types.WindowManager.api_search = bpy.props.StringProperty(name="Search API",
+                                                                  description="Search the offline index of the Python API",
+                                                                  update=search_api)
     bpy.utils.register_class(APILookupOperator)
+    bpy.utils.register_class(APIIndexOperator)
+    bpy.utils.register_class(APIResolveOperator)
     bpy.utils.register_class(UtilityPanel)
     bpy.types.TEXT_MT_context_menu.append(menu_draw)
     bpy.types.TEXT_MT_edit.append(menu_draw)
@@ -98,7 +218,10 @@ def unregister():
     bpy.types.TEXT_MT_edit.remove(menu_draw)
     bpy.types.TEXT_MT_context_menu.remove(menu_draw)
     bpy.utils.unregister_class(UtilityPanel)
+    bpy.utils.unregister_class(APIResolveOperator)
+    bpy.utils.unregister_class(APIIndexOperator)
     bpy.utils.unregister_class(APILookupOperator)
+    del bpy.types.WindowManager.api_search
     
 if __name__ == "__main__":
     register()
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""Offline index of the Python API of the running Blender.
+
+Structs with their own properties and functions, operators with their
+arguments and the property functions are collected by RNA introspection of
+bpy.types, bpy.ops and bpy.props. The index is pickled per Blender build,
+so it is only collected once, and kept as parallel lists of strings.
+
+Names and descriptions are searched with str.find over one string of all of
+them in lower case, so only the matches are looked at in Python.
+"""
+
+import os
+import bisect
+import pickle
+
+import bpy
+
+INDEX_VERSION = 1
+
+# kind -> icon in the results list
+KINDS = {
+    'STRUCT': 'RNA',
+    'PROPERTY': 'PROPERTIES',
+    'FUNCTION': 'SCRIPT',
+    'OPERATOR': 'PLAY',
+}
+
+
+def index_path():
+    from .. import cache_path
+
+    build = bpy.app.build_hash
+    if isinstance(build, bytes):
+        build = build.decode("ascii", "replace")
+    version = "_".join(str(v) for v in bpy.app.version)
+    return cache_path(f"api_index_{version}_{build}.pickle")
+
+
+def property_type(prop):
+    kind = prop.type
+    if kind in {'POINTER', 'COLLECTION'}:
+        fixed = getattr(prop, "fixed_type", None)
+        if fixed is not None:
+            return f"{kind.lower()} of {fixed.identifier}"
+    elif kind == 'ENUM':
+        items = [item.identifier for item in prop.enum_items]
+        if items:
+            return "enum in [" + ", ".join(items) + "]"
+    elif getattr(prop, "array_length", 0):
+        return f"{kind.lower()} array of {prop.array_length}"
+    return kind.lower()
+
+
+def function_signature(func):
+    args = [p.identifier for p in func.parameters if not p.is_output]
+    return "(" + ", ".join(args) + ")"
+
+
+def collect():
+    """Return (names, kinds, details, descriptions) of the whole API."""
+    names = []
+    kinds = []
+    details = []
+    descriptions = []
+
+    def add(name, kind, detail, description):
+        names.append(name)
+        kinds.append(kind)
+        details.append(detail)
+        descriptions.append(description)
+
+    for identifier in dir(bpy.types):
+        cls = getattr(bpy.types, identifier, None)
+        rna = getattr(cls, "bl_rna", None)
+        if rna is None:
+            continue
+
+        base = rna.base
+        add("bpy.types." + identifier, 'STRUCT', base.identifier if base else "", rna.description)
+
+        # inherited members are listed with the struct defining them
+        inherited = set()
+        if base is not None:
+            inherited = {p.identifier for p in base.properties} | {f.identifier for f in base.functions}
+
+        for prop in rna.properties:
+            if prop.identifier == "rna_type" or prop.identifier in inherited:
+                continue
+            add(f"bpy.types.{identifier}.{prop.identifier}", 'PROPERTY', property_type(prop), prop.description)
+
+        for func in rna.functions:
+            if func.identifier in inherited:
+                continue
+            add(f"bpy.types.{identifier}.{func.identifier}", 'FUNCTION', function_signature(func), func.description)
+
+    for module in dir(bpy.ops):
+        ops = getattr(bpy.ops, module)
+        for name in dir(ops):
+            try:
+                rna = getattr(ops, name).get_rna_type()
+            except (KeyError, AttributeError):
+                continue
+            args = [p.identifier for p in rna.properties if p.identifier != "rna_type"]
+            add(f"bpy.ops.{module}.{name}", 'OPERATOR', "(" + ", ".join(args) + ")", rna.description)
+
+    for name in dir(bpy.props):
+        if name.startswith("_"):
+            continue
+        doc = (getattr(bpy.props, name).__doc__ or "").strip()
+        add("bpy.props." + name, 'FUNCTION', "", doc.split("\n\n")[0].replace("\n", " "))
+
+    return names, kinds, details, descriptions
+
+
+class Haystack():
+    """Lower case strings joined into one, to find the ones containing a query with str.find."""
+
+    def __init__(self, strings):
+        lowered = [s.lower().replace("\n", " ") for s in strings]
+        #every string is preceded by a newline, so prefixes can be found too
+        self.text = "\n" + "\n".join(lowered) + "\n"
+        self.starts = []
+        pos = 1
+        for s in lowered:
+            self.starts.append(pos)
+            pos += len(s) + 1
+
+    def find(self, query):
+        """Yield the indices of the strings containing query, each once."""
+        text = self.text
+        starts = self.starts
+        pos = text.find(query)
+        while pos != -1:
+            i = bisect.bisect_right(starts, pos) - 1
+            yield i
+            #continue with the next string
+            end = starts[i + 1] if i + 1 < len(starts) else len(text)
+            pos = text.find(query, end)
+
+    def find_prefix(self, query):
+        """Yield the indices of the strings starting with query."""
+        text = self.text
+        needle = "\n" + query
+        pos = text.find(needle)
+        while pos != -1:
+            yield bisect.bisect_left(self.starts, pos + 1)
+            pos = text.find(needle, pos + 1)
+
+
+class APIIndex():
+
+    def __init__(self, names, kinds, details, descriptions):
+        self.names = names
+        self.kinds = kinds
+        self.details = details
+        self.descriptions = descriptions
+
+        self.name_haystack = Haystack(names)
+        self.description_haystack = Haystack(descriptions)
+        self.lookup = {n: i for i, n in enumerate(names)}
+        self.lookup_lower = {}
+        self.last_exact = {}
+        lasts = []
+        for i, n in enumerate(names):
+            self.lookup_lower.setdefault(n.lower(), []).append(i)
+            last = n.rsplit(".", 1)[-1]
+            self.last_exact.setdefault(last.lower(), []).append(i)
+            lasts.append(last)
+        self.last_haystack = Haystack(lasts)
+
+    def __len__(self):
+        return len(self.names)
+
+    def entry(self, i):
+        return self.names[i], self.kinds[i], self.details[i], self.descriptions[i]
+
+    def get(self, name):
+        """Return the index of the entry named exactly name, else None."""
+        return self.lookup.get(name)
+
+    def search(self, query, limit=50):
+        """Return the indices of the best matches of query, best first: names
+        whose last part is the query, names whose last part starts with it,
+        other names containing it, then descriptions containing it. Shorter
+        names come first within the first two groups."""
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        results = []
+        found = set()
+
+        def take(indices):
+            for i in indices:
+                if i not in found:
+                    found.add(i)
+                    results.append(i)
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        names = self.names
+        by_length = lambda i: (len(names[i]), i)
+        #whole dotted names, like bpy.types.Object, are exact matches too
+        exact = self.lookup_lower.get(query, []) + self.last_exact.get(query, [])
+        if take(sorted(exact, key=by_length)):
+            return results
+        if take(sorted(self.last_haystack.find_prefix(query), key=by_length)):
+            return results
+        if take(self.name_haystack.find(query)):
+            return results
+        take(self.description_haystack.find(query))
+        return results
+
+
+    def resolve(self, identifier):
+        """Return (index or None, number of candidates) of a dotted identifier.
+        Names of the index are matched exactly, else the longest known prefix
+        is used, else the parts are looked up as member of any struct, last
+        part first, e.g. obj.location.x."""
+        i = self.lookup.get(identifier)
+        if i is not None:
+            return i, 1
+
+        parts = identifier.split(".")
+        if parts[0] == "bpy":
+            for n in range(len(parts) - 1, 2, -1):
+                i = self.lookup.get(".".join(parts[:n]))
+                if i is not None:
+                    return i, 1
+
+        #the first part is a variable, of the rest the last known member wins
+        for part in reversed(parts[1:]):
+            members = [i for i in self.last_exact.get(part.lower(), ())
+                       if self.kinds[i] in {'PROPERTY', 'FUNCTION'} and self.names[i].endswith("." + part)]
+            if members:
+                return min(members, key=lambda i: (len(self.names[i]), i)), len(members)
+        return None, 0
+
+    def resolve_all(self, identifiers):
+        """Return (identifier, entry or None, candidates) of each identifier."""
+        rows = []
+        for identifier in identifiers:
+            i, candidates = self.resolve(identifier)
+            rows.append((identifier, self.entry(i) if i is not None else None, candidates))
+        return rows
+
+
+def identifiers(source):
+    """Return the dotted identifiers in source, each once, in order of appearance."""
+    import re
+
+    return list(dict.fromkeys(re.findall(r"(?<![\w.])[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+", source)))
+
+
+def load_index(path):
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION:
+        return None
+    return APIIndex(*data["columns"])
+
+
+def save_index(path, index):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({"version": INDEX_VERSION,
+                     "columns": (index.names, index.kinds, index.details, index.descriptions)},
+                    f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+_index = None
+
+def get_api_index(rebuild=False):
+    """Return the index of this Blender build, loaded from the cache or collected."""
+    global _index
+    from ..profiling import span
+
+    if _index is not None and not rebuild:
+        return _index
+
+    path = index_path()
+    if not rebuild:
+        with span("api index load"):
+            _index = load_index(path)
+    if _index is None or rebuild:
+        with span("api index build"):
+            _index = APIIndex(*collect())
+        try:
+            save_index(path, _index)
+        except OSError as e:
+            print(e)
+    return _index
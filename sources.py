@@ -0,0 +1,174 @@
+"""Discovery of the python source files of packages without importing them.
+
+Module files are resolved from the package __path__ (or the import spec of
+a module name) and by listing the package directories, so the module level
+code of the discovered modules never runs.
+"""
+
+import os
+import sys
+import importlib.util
+
+
+def module_location(module):
+    """Return (source file, search locations) of a module object or module name.
+    The file is None for namespace packages, the locations None for plain modules."""
+    if isinstance(module, str):
+        loaded = sys.modules.get(module)
+        if loaded is None:
+            # only the parent packages of a dotted name get imported here
+            spec = importlib.util.find_spec(module)
+            if spec is None:
+                return None, None
+            origin = spec.origin if spec.has_location else None
+            return origin, spec.submodule_search_locations
+        module = loaded
+
+    return getattr(module, "__file__", None), getattr(module, "__path__", None)
+
+
+def file_key(path):
+    """Return what tells whether the file at path changed, a list so it survives json."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def module_origin(module):
+    return module_location(module)[0]
+
+
+def iter_package_files(dirs, prefix):
+    modules = {}
+    packages = {}
+    namespaces = {}
+
+    for d in dirs:
+        try:
+            entries = sorted(os.scandir(d), key=lambda e: e.name)
+        except OSError:
+            continue
+
+        for entry in entries:
+            name = entry.name
+            if entry.is_dir():
+                if not name.isidentifier() or name == "__pycache__":
+                    continue
+                init = os.path.join(entry.path, "__init__.py")
+                if os.path.isfile(init):
+                    packages.setdefault(name, (init, entry.path))
+                else:
+                    namespaces.setdefault(name, []).append(entry.path)
+            elif name.endswith(".py"):
+                modname = name[:-3]
+                if modname != "__init__" and modname.isidentifier():
+                    modules.setdefault(modname, entry.path)
+
+    # like the import system, a regular package wins over a module of the same
+    # name, and namespace portions are only used if neither exists
+    for name in sorted(set(modules) | set(packages) | set(namespaces)):
+        if name in packages:
+            init, path = packages[name]
+            yield prefix + name, init
+            yield from iter_package_files([path], prefix + name + ".")
+        elif name in modules:
+            yield prefix + name, modules[name]
+        else:
+            yield from iter_package_files(namespaces[name], prefix + name + ".")
+
+
+def iter_module_files(module):
+    """Yield (module name, source file) of a module or package and of all its
+    submodules, including namespace packages."""
+    name = module if isinstance(module, str) else module.__name__
+    origin, locations = module_location(module)
+
+    if origin is not None and origin.endswith(".py"):
+        yield name, origin
+
+    if locations:
+        yield from iter_package_files(list(locations), name + ".")
+
+
+def addon_roots():
+    """Return (directory, package prefix) of every directory addons are installed in,
+    the legacy addon paths and the enabled extension repositories."""
+    import bpy
+    import addon_utils
+
+    roots = [(path, "") for path in addon_utils.paths()]
+    extensions = getattr(bpy.context.preferences, "extensions", None)
+    if extensions is not None:
+        for repo in extensions.repos:
+            if repo.enabled and os.path.isdir(repo.directory):
+                roots.append((repo.directory, "bl_ext.%s." % repo.module))
+    return roots
+
+
+class AddonIndex():
+    """Module name -> (path, is package) of all installed addons.
+
+    Built by listing the addon directories instead of addon_utils.modules(),
+    which parses every addon's bl_info, and rebuilt only once the mtime of one
+    of the directories changed, which happens when an addon gets installed,
+    removed or renamed."""
+
+    def __init__(self):
+        self.key = None
+        self.modules = {}
+
+    def stamp(self, roots):
+        key = []
+        for path, prefix in roots:
+            try:
+                key.append((path, prefix, os.stat(path).st_mtime_ns))
+            except OSError:
+                key.append((path, prefix, None))
+        return tuple(key)
+
+    def rebuild(self, roots):
+        modules = {}
+        for path, prefix in roots:
+            try:
+                entries = sorted(os.scandir(path), key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir():
+                    if name.isidentifier() and os.path.isfile(os.path.join(entry.path, "__init__.py")):
+                        modules.setdefault(prefix + name, (entry.path, True))
+                elif name.endswith(".py") and name[:-3].isidentifier():
+                    modules.setdefault(prefix + name[:-3], (entry.path, False))
+        self.modules = modules
+
+    def refresh(self):
+        from .profiling import span
+
+        roots = addon_roots()
+        key = self.stamp(roots)
+        if key != self.key:
+            with span("addon index"):
+                self.rebuild(roots)
+            self.key = key
+
+    def lookup(self, module):
+        """Return (path, is package) of the addon module, (None, False) if it isn't installed.
+        The path is the package directory for packages, else the module file."""
+        self.refresh()
+        path, isdir = self.modules.get(module, (None, False))
+        if path is not None and not os.path.exists(path):
+            # removed without touching its parent directory, e.g. a symlink target
+            self.key = None
+            self.refresh()
+            path, isdir = self.modules.get(module, (None, False))
+        return path, isdir
+
+
+_addon_index = None
+
+def get_addon_index():
+    global _addon_index
+
+    if _addon_index is None:
+        _addon_index = AddonIndex()
+    return _addon_index
@@ -0,0 +1,155 @@
+"""Text datablocks opened by this addon.
+
+Texts are found by their normalized file path through an index instead of
+scanning bpy.data.texts, and a file is never loaded a second time while a
+text of it exists. Texts this addon loaded are closed again, least recently
+used first, once the count or size budget set in the preferences is
+exceeded. Texts with unsaved edits, texts shown in an editor and texts the
+user opened are never closed. The files of all texts opened here are
+watched for changes made outside of Blender.
+"""
+
+import os
+from collections import OrderedDict
+
+import bpy
+
+
+def normpath(path):
+    return os.path.normcase(os.path.abspath(bpy.path.abspath(path)))
+
+
+class TextManager():
+
+    def __init__(self):
+        # normalized path -> text name
+        self.index = {}
+        self.count = -1
+        # normalized path -> file size of texts this addon loaded, oldest first
+        self.opened = OrderedDict()
+
+    def rebuild(self):
+        self.index = {}
+        for text in bpy.data.texts:
+            if text.filepath:
+                self.index[normpath(text.filepath)] = text.name
+        self.count = len(bpy.data.texts)
+
+    def lookup(self, key):
+        name = self.index.get(key)
+        if name is None:
+            return None
+        text = bpy.data.texts.get(name)
+        if text is None or not text.filepath or normpath(text.filepath) != key:
+            return None
+        return text
+
+    def find(self, path):
+        """Return the text of the file at path if one is loaded, else None."""
+        key = normpath(path)
+        if len(bpy.data.texts) != self.count:
+            self.rebuild()
+
+        text = self.lookup(key)
+        if text is None and key in self.index:
+            # renamed, removed or saved elsewhere since the index was built
+            self.rebuild()
+            text = self.lookup(key)
+        return text
+
+    def touch(self, path):
+        key = normpath(path)
+        if key in self.opened:
+            self.opened.move_to_end(key)
+
+    def open(self, path, evict=True):
+        """Return the text of the file at path, loading it if necessary.
+        Returns (text, loaded)."""
+        from .watch import get_watcher
+
+        get_watcher().watch(path)
+        text = self.find(path)
+        if text is not None:
+            self.touch(path)
+            return text, False
+
+        key = normpath(path)
+        text = bpy.data.texts.load(path)
+        self.index[key] = text.name
+        self.count = len(bpy.data.texts)
+        try:
+            self.opened[key] = os.path.getsize(path)
+        except OSError:
+            self.opened[key] = 0
+
+        if evict:
+            self.evict(protect={key})
+        return text, True
+
+    def visible(self):
+        names = set()
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'TEXT_EDITOR':
+                    for space in area.spaces:
+                        if space.type == 'TEXT_EDITOR' and space.text is not None:
+                            names.add(space.text.name)
+        return names
+
+    def evict(self, protect=()):
+        """Close the least recently used texts this addon loaded until the budget is met."""
+        from . import DeveloperUtilitiesPreferences
+        from .watch import get_watcher
+
+        addon_prefs = bpy.context.preferences.addons[DeveloperUtilitiesPreferences.bl_idname].preferences
+        max_count = addon_prefs.max_open_texts
+        max_bytes = addon_prefs.max_open_text_mb * 1024 * 1024
+
+        total = sum(self.opened.values())
+        if (not max_count or len(self.opened) <= max_count) and (not max_bytes or total <= max_bytes):
+            return 0
+
+        visible = self.visible()
+        closed = 0
+        for key in list(self.opened):
+            if (not max_count or len(self.opened) <= max_count) and (not max_bytes or total <= max_bytes):
+                break
+            if key in protect:
+                continue
+
+            text = self.lookup(key)
+            if text is None:
+                # closed by the user already
+                total -= self.opened.pop(key)
+                continue
+            if text.name in visible:
+                continue
+            if get_watcher().is_edited(key, text):
+                # edited, it is the user's text now, texts reloaded on a change are dirty too
+                total -= self.opened.pop(key)
+                continue
+
+            total -= self.opened.pop(key)
+            del self.index[key]
+            bpy.data.texts.remove(text)
+            closed += 1
+
+        self.count = len(bpy.data.texts)
+        return closed
+
+
+_manager = None
+
+def get_manager():
+    global _manager
+
+    if _manager is None:
+        _manager = TextManager()
+    return _manager
+
+
+def redraw_text_editors():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'TEXT_EDITOR':
+                area.tag_redraw()
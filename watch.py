@@ -0,0 +1,155 @@
+"""Reload of texts whose files were changed outside of Blender.
+
+Every file opened through the text manager is watched. A timer stats a fixed
+number of the watched files per tick, round robin, so the cost of a tick
+stays the same however many files are watched, only the time until a change
+is noticed grows. A text is reloaded only if the file content differs from
+it, and never if it has edits which were not loaded from the file.
+"""
+
+import os
+import hashlib
+
+import bpy
+
+# files stat'ed per tick and seconds between ticks
+BATCH = 32
+INTERVAL = 0.5
+
+
+def stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def digest(source):
+    return hashlib.blake2b(source.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class Watcher():
+
+    def __init__(self):
+        # normalized path -> [path, stamp]
+        self.files = {}
+        self.order = []
+        self.next = 0
+        # normalized path -> digest of the content this watcher put into the text
+        self.reloaded = {}
+
+    def watch(self, path):
+        from .texts import normpath
+
+        key = normpath(path)
+        if key not in self.files:
+            self.files[key] = [path, stamp(path)]
+            self.order.append(key)
+
+    def forget(self, key):
+        self.files.pop(key, None)
+        self.reloaded.pop(key, None)
+        self.order.remove(key)
+        if self.next >= len(self.order):
+            self.next = 0
+
+    def changed(self, batch=BATCH):
+        """Stat the next batch of files, return the keys of the changed ones."""
+        changed = []
+        n = min(batch, len(self.order))
+        for _ in range(n):
+            key = self.order[self.next]
+            self.next = (self.next + 1) % len(self.order)
+            entry = self.files[key]
+            st = stamp(entry[0])
+            if st != entry[1]:
+                entry[1] = st
+                changed.append(key)
+        return changed
+
+    def is_edited(self, key, text):
+        # texts this watcher reloaded are dirty too, unless edited since they match the file
+        if not text.is_dirty:
+            return False
+        loaded = self.reloaded.get(key)
+        return loaded is None or digest(text.as_string()) != loaded
+
+    def reload(self, key, text):
+        path = self.files[key][0]
+        try:
+            with open(path, encoding="utf-8") as f:
+                source = f.read()
+        except (OSError, UnicodeDecodeError):
+            return False
+
+        if source == text.as_string():
+            return False
+
+        line = text.current_line_index
+        character = text.current_character
+        select_line = text.select_end_line_index
+        select_character = text.select_end_character
+
+        text.from_string(source)
+
+        last = len(text.lines) - 1
+        text.cursor_set(min(line, last), character=character)
+        if (select_line, select_character) != (line, character):
+            text.cursor_set(min(select_line, last), character=select_character, select=True)
+
+        self.reloaded[key] = digest(source)
+        return True
+
+    def tick(self):
+        from .texts import get_manager
+        from .profiling import span, count
+
+        if not self.order:
+            return 0
+
+        manager = get_manager()
+        reloaded = 0
+        with span("watch"):
+            for key in self.changed():
+                text = manager.find(self.files[key][0])
+                if text is None:
+                    # closed, nothing to keep up to date anymore
+                    self.forget(key)
+                    continue
+                if self.is_edited(key, text):
+                    print(f"Not reloading {text.name}, it has unsaved edits")
+                    continue
+                if self.reload(key, text):
+                    reloaded += 1
+                    print(f"Reloaded {text.name}, it was changed on disk")
+        count("texts reloaded", reloaded)
+        return reloaded
+
+
+_watcher = None
+
+def get_watcher():
+    global _watcher
+
+    if _watcher is None:
+        _watcher = Watcher()
+    return _watcher
+
+
+def watch_tick():
+    from .texts import redraw_text_editors
+
+    if get_watcher().tick():
+        redraw_text_editors()
+    return INTERVAL
+
+
+def start_watching():
+    if not bpy.app.timers.is_registered(watch_tick):
+        bpy.app.timers.register(watch_tick, first_interval=INTERVAL, persistent=True)
+
+
+def stop_watching():
+    if bpy.app.timers.is_registered(watch_tick):
+        bpy.app.timers.unregister(watch_tick)